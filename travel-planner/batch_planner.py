@@ -0,0 +1,150 @@
+import os
+import json
+import math
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from config import POI_DATA_FILE, LLM_CONCURRENCY
+from poi_manager import POIManager
+from poi_snapshot import load_snapshot
+from travel_planner import TravelPlanner
+from text_generator import TextGenerator, set_llm_slots
+from user_preferences import UserPreferences
+
+# Headless planning of many preference profiles:
+#   python batch_planner.py --input profiles.jsonl --output plans.jsonl --workers 8
+# Each input line holds UserPreferences fields (plus an optional "id"); each output line
+# holds the id, the preferences and either the plan or the error, in completion order.
+
+# One POI index, LLM cache and planner per process: shared by all threads of the
+# thread pool, or built once per worker by the process pool initializer
+_planner: Optional[TravelPlanner] = None
+_text_generator: Optional[TextGenerator] = None
+_poi_manager: Optional[POIManager] = None
+_poi_file: str = POI_DATA_FILE
+
+
+def init_worker(poi_file: str = POI_DATA_FILE, llm_slots=None) -> None:
+    global _planner, _text_generator, _poi_manager, _poi_file
+    _poi_file = poi_file
+    if llm_slots is not None:
+        # The process pool's workers share one LLM_CONCURRENCY cap
+        set_llm_slots(llm_slots)
+    _poi_manager = POIManager()
+    _poi_manager.load_pois(poi_file)
+    _text_generator = TextGenerator()
+    _planner = TravelPlanner(_text_generator, poi_manager=_poi_manager)
+
+
+def plan_profile(record_id, record: Dict) -> Tuple[Dict, float]:
+    # Plans one profile; errors are reported in the output line instead of stopping the batch
+    started = time.perf_counter()
+    result = {"id": record_id}
+    try:
+        preferences = UserPreferences.from_dict({key: value for key, value in record.items() if key != "id"})
+        result["preferences"] = preferences.to_dict()
+        poi_dict = _poi_manager.load_and_filter_pois(_poi_file, preferences)
+        result["plan"] = _planner.generate_travel_plan(poi_dict, preferences)
+    except Exception as e:
+        result["error"] = str(e)
+    return result, time.perf_counter() - started
+
+
+def read_profiles(path: str) -> List[Tuple[object, Dict]]:
+    profiles = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            profiles.append((record.get("id", line_number), record))
+    return profiles
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    # Nearest-rank percentile
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_batch(
+    profiles: List[Tuple[object, Dict]],
+    output_path: str,
+    workers: int,
+    use_processes: bool = False,
+    poi_file: str = POI_DATA_FILE
+) -> Dict:
+    if use_processes:
+        # Built or refreshed once here, so the workers only open the existing snapshot
+        load_snapshot(poi_file)
+        llm_slots = multiprocessing.BoundedSemaphore(max(1, LLM_CONCURRENCY))
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(poi_file, llm_slots))
+    else:
+        init_worker(poi_file)
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    output_directory = os.path.dirname(output_path)
+    if output_directory and not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+
+    latencies = []
+    failed = 0
+    started = time.perf_counter()
+    with executor, open(output_path, 'w', encoding='utf-8') as out:
+        futures = [executor.submit(plan_profile, record_id, record) for record_id, record in profiles]
+        for done, future in enumerate(as_completed(futures), 1):
+            result, latency = future.result()
+            latencies.append(latency)
+            if "error" in result:
+                failed += 1
+                print(f"[{done}/{len(profiles)}] {result['id']}: error - {result['error']}")
+            else:
+                print(f"[{done}/{len(profiles)}] {result['id']}: planned in {latency:.1f}s")
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    elapsed = time.perf_counter() - started
+
+    stats = {
+        "plans": len(profiles) - failed,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 2),
+        "plans_per_min": round((len(profiles) - failed) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "latency_p50_s": round(percentile(latencies, 0.50), 2),
+        "latency_p95_s": round(percentile(latencies, 0.95), 2)
+    }
+    if not use_processes:
+        stats["llm_cache"] = _text_generator.cache_stats()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan trips for a JSONL file of preference profiles.")
+    parser.add_argument("--input", required=True, help="JSONL, one UserPreferences record per line")
+    parser.add_argument("--output", default="output/plans.jsonl", help="JSONL, one plan per line")
+    parser.add_argument("--pois", default=POI_DATA_FILE, help="POI JSON file")
+    parser.add_argument("--workers", type=int, default=LLM_CONCURRENCY, help="profiles planned at the same time")
+    parser.add_argument("--processes", action="store_true",
+                        help="use a process pool (one POI index and LLM memory cache per process) instead of threads")
+    args = parser.parse_args()
+
+    profiles = read_profiles(args.input)
+    stats = run_batch(profiles, args.output, max(1, args.workers), args.processes, args.pois)
+
+    print(f"\nPlanned {stats['plans']} profiles ({stats['failed']} failed) in {stats['elapsed_s']}s")
+    print(f"Throughput: {stats['plans_per_min']} plans/min")
+    print(f"Latency: p50 {stats['latency_p50_s']}s, p95 {stats['latency_p95_s']}s")
+    cache_stats = stats.get("llm_cache")
+    if cache_stats:
+        print(
+            f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']}% hit rate)"
+        )
+
+if __name__ == "__main__":
+    main()
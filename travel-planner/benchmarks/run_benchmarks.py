@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+from poi_manager import POIManager
+from travel_planner import TravelPlanner
+from user_preferences import UserPreferences
+from benchmarks.synthetic_data import synthetic_dataset_path
+
+# CPU-side pipeline stages on synthetic datasets 1x..1000x the size of csvjson.json:
+#   python -m benchmarks.run_benchmarks                    compare against benchmarks/baseline.json
+#   python -m benchmarks.run_benchmarks --update-baseline  record a new baseline
+# Exits with status 1 when a stage is slower or uses more memory than the baseline allows.
+# Times are compared relative to a calibration workload timed next to each run, so the
+# baseline survives moderate differences in machine speed and load.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SCALES = [1, 10, 100, 1000]
+# Differences below these are noise, whatever the relative change
+TIME_NOISE_FLOOR_SECONDS = 0.0005
+MEMORY_NOISE_FLOOR_KIB = 64
+
+PROFILES = [
+    UserPreferences(interests=["Castle", "Walking"], trip_duration=5, realization_of_pois_per_day=3),
+    UserPreferences(
+        interests=["Food and Drink", "Music", "Beach"], trip_duration=3, realization_of_pois_per_day=4,
+        regions=["Kerry", "Cork", "Galway"]
+    ),
+    UserPreferences(interests=["Museums and Attraction", "Gardens"], trip_duration=7, realization_of_pois_per_day=2),
+]
+
+
+def organized_text(organized_days: List[List[Dict]]) -> str:
+    # What a well-behaved LLM answer to the _organize_days prompt looks like
+    lines = []
+    for day_number, day_pois in enumerate(organized_days, 1):
+        lines.append(f"Day {day_number}:")
+        lines.extend(f"{index}. {poi['Name']} - fits the day" for index, poi in enumerate(day_pois, 1))
+    return "\n".join(lines)
+
+
+def stage_calls(poi_manager: POIManager, planner: TravelPlanner) -> List[Tuple[str, Callable[[], object]]]:
+    # Inputs of every stage are prepared up front so each timing covers only its own stage
+    prepared = []
+    for preferences in PROFILES:
+        filtered = poi_manager._filter_pois(preferences)
+        days = planner._simple_day_organization(filtered, preferences)
+        prepared.append((preferences, filtered, days, organized_text(days)))
+
+    return [
+        ("filter_pois", lambda: [poi_manager._filter_pois(p) for p, _, _, _ in prepared]),
+        ("organize_pois", lambda: [poi_manager._organize_pois(f) for _, f, _, _ in prepared]),
+        ("simple_day_organization", lambda: [planner._simple_day_organization(f, p) for p, f, _, _ in prepared]),
+        ("parse_organized_days", lambda: [planner._parse_organized_days(t, f, p) for p, f, _, t in prepared]),
+        ("interests_accuracy", lambda: [planner._calculate_interests_accuracy(d, p.interests) for p, _, d, _ in prepared]),
+    ]
+
+
+def calibration_workload() -> None:
+    # Fixed mix of the operations the stages spend their time on (string splitting and
+    # matching, dict building, sorting); its duration measures how fast this machine is right now
+    tags = [f"Tag {i % 97},Other Tag {i % 13},Walking" for i in range(20000)]
+    counts = {}
+    for text in tags:
+        for tag in text.lower().split(','):
+            counts[tag.strip()] = counts.get(tag.strip(), 0) + ("walk" in tag)
+    sorted(tags, key=len)
+
+
+def timed(fn: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict:
+    # Each timed run is paired with a calibration run right before it, so a slower (or busier)
+    # machine shifts both and "relative" (median of the per-pair ratios) stays comparable
+    timings = []
+    calibrations = []
+    for _ in range(repeat):
+        calibrations.append(timed(calibration_workload))
+        timings.append(timed(fn))
+
+    # Separate run for memory: tracing slows the code down too much to time it
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": round(min(timings), 6),
+        "median_seconds": round(statistics.median(timings), 6),
+        "relative": round(statistics.median(t / c for t, c in zip(timings, calibrations)), 4),
+        "peak_kib": round((peak - before) / 1024, 1)
+    }
+
+
+def run(scales: List[int], repeat: int) -> Dict:
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scales": {}
+    }
+    for scale in scales:
+        path = synthetic_dataset_path(scale)
+        poi_manager = POIManager()
+        started = time.perf_counter()
+        poi_manager.load_pois(path)
+        load_seconds = time.perf_counter() - started
+        planner = TravelPlanner(None, poi_manager=poi_manager)
+
+        stages = {}
+        for name, fn in stage_calls(poi_manager, planner):
+            stages[name] = measure(fn, repeat)
+        results["scales"][str(scale)] = {"pois": len(poi_manager.pois), "load_seconds": round(load_seconds, 3), "stages": stages}
+        print_scale(scale, results["scales"][str(scale)])
+    return results
+
+
+def print_scale(scale: int, result: Dict) -> None:
+    print(f"\n{scale}x ({result['pois']} POIs, loaded in {result['load_seconds']:.2f}s)")
+    print(f"  {'stage':<26} {'min':>10} {'median':>10} {'relative':>10} {'peak mem':>12}")
+    for name, stage in result["stages"].items():
+        print(
+            f"  {name:<26} {stage['seconds'] * 1000:>8.2f}ms {stage['median_seconds'] * 1000:>8.2f}ms "
+            f"{stage['relative']:>10.3f} {stage['peak_kib']:>9.1f}KiB"
+        )
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, memory_tolerance: float) -> List[str]:
+    regressions = []
+    for scale, result in results["scales"].items():
+        baseline_stages = baseline.get("scales", {}).get(scale, {}).get("stages", {})
+        for name, stage in result["stages"].items():
+            base = baseline_stages.get(name)
+            if base is None:
+                print(f"  (no baseline for {name} at {scale}x)")
+                continue
+            # Compared in calibration units; the noise floor is converted at this run's machine speed
+            calibration = stage["median_seconds"] / stage["relative"]
+            allowed_relative = base["relative"] * (1 + tolerance) + TIME_NOISE_FLOOR_SECONDS / calibration
+            if stage["relative"] > allowed_relative:
+                regressions.append(
+                    f"{name} at {scale}x: {stage['relative']:.3f} vs baseline {base['relative']:.3f} calibration units "
+                    f"(+{(stage['relative'] / base['relative'] - 1) * 100:.0f}%, {stage['seconds'] * 1000:.2f}ms now, "
+                    f"{base['seconds'] * 1000:.2f}ms in the baseline)"
+                )
+            allowed_kib = base["peak_kib"] * (1 + memory_tolerance) + MEMORY_NOISE_FLOOR_KIB
+            if stage["peak_kib"] > allowed_kib:
+                regressions.append(
+                    f"{name} at {scale}x: peak {stage['peak_kib']:.1f}KiB vs baseline {base['peak_kib']:.1f}KiB"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CPU-side planning stages on scaled synthetic data.")
+    parser.add_argument("--scales", default=",".join(str(scale) for scale in DEFAULT_SCALES),
+                        help="dataset sizes as multiples of csvjson.json, comma-separated")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per stage")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown vs the baseline (0.5 = +50%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed peak memory growth")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+    results = run(scales, max(1, args.repeat))
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline} - run with --update-baseline to create one")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nREGRESSIONS against the baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print("\nNo regressions against the baseline.")
+
+if __name__ == "__main__":
+    main()
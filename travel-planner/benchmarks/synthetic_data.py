@@ -0,0 +1,61 @@
+import os
+import json
+import random
+from typing import Dict, List
+from config import POI_DATA_FILE
+
+# Synthetic POI files N times the size of csvjson.json. Copy k of every source POI keeps
+# its region and (mostly) its tag combination, so the region and tag distributions match
+# the real data; names are made unique and coordinates jittered so that name matching
+# and geo queries do real work.
+BENCHMARK_DATA_DIR = os.path.join("cache", "benchmarks")
+COORDINATE_JITTER_DEGREES = 0.05
+# Share of copies that drop one tag or borrow one from another POI of the same region
+TAG_VARIATION_RATE = 0.2
+
+
+def load_source_pois(path: str = POI_DATA_FILE) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def synthesize_pois(source_pois: List[Dict], scale: int, seed: int = 0) -> List[Dict]:
+    # scale == 1 returns the source records unchanged
+    rng = random.Random(seed)
+    tags_by_region = {}
+    for poi in source_pois:
+        tags_by_region.setdefault(poi['AddressRegion'], []).append(poi['Tags'].split(','))
+
+    pois = [dict(poi) for poi in source_pois]
+    for copy in range(1, scale):
+        for poi in source_pois:
+            synthetic = dict(poi)
+            synthetic['Name'] = f"{poi['Name']} {copy}"
+            synthetic['Latitude'] = poi['Latitude'] + rng.uniform(-COORDINATE_JITTER_DEGREES, COORDINATE_JITTER_DEGREES)
+            synthetic['Longitude'] = poi['Longitude'] + rng.uniform(-COORDINATE_JITTER_DEGREES, COORDINATE_JITTER_DEGREES)
+
+            tags = poi['Tags'].split(',')
+            if rng.random() < TAG_VARIATION_RATE:
+                if len(tags) > 1 and rng.random() < 0.5:
+                    tags.pop(rng.randrange(len(tags)))
+                else:
+                    borrowed = rng.choice(rng.choice(tags_by_region[poi['AddressRegion']]))
+                    if borrowed not in tags:
+                        tags.append(borrowed)
+            synthetic['Tags'] = ",".join(tags)
+            pois.append(synthetic)
+    return pois
+
+
+def synthetic_dataset_path(scale: int, source_path: str = POI_DATA_FILE, data_dir: str = BENCHMARK_DATA_DIR) -> str:
+    # Written once per scale; the POI snapshot of each file is then built by POIManager as usual
+    path = os.path.join(data_dir, f"pois_x{scale}.json")
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source_path):
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+    pois = synthesize_pois(load_source_pois(source_path), scale)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(pois, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
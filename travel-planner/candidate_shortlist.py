@@ -0,0 +1,105 @@
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+from user_preferences import UserPreferences
+from relevance_index import RelevanceIndex
+from config import SHORTLIST_FACTOR, ORGANIZE_POI_LIST_TOKEN_BUDGET, SHORTLIST_TOKENIZER
+
+# Weights of the shortlist ranking
+INTEREST_WEIGHT = 1.0
+REGION_WEIGHT = 0.5
+DIVERSITY_WEIGHT = 0.3
+# Candidates kept (as a multiple of the shortlist size) before the greedy diversity pass
+POOL_FACTOR = 4
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+def _get_tokenizer():
+    # HF `tokenizers` tokenizer, loaded once; None when none is configured or it can't be loaded (e.g. offline)
+    global _tokenizer, _tokenizer_loaded
+    with _tokenizer_lock:
+        if not _tokenizer_loaded:
+            _tokenizer_loaded = True
+            if not SHORTLIST_TOKENIZER:
+                return None
+            try:
+                from tokenizers import Tokenizer
+                if os.path.isfile(SHORTLIST_TOKENIZER):
+                    _tokenizer = Tokenizer.from_file(SHORTLIST_TOKENIZER)
+                else:
+                    _tokenizer = Tokenizer.from_pretrained(SHORTLIST_TOKENIZER)
+            except Exception as e:
+                print(f"[Shortlist] Tokenizer unavailable ({str(e)}), estimating tokens from length")
+        return _tokenizer
+
+def count_tokens(text: str) -> int:
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return max(1, len(text) // 4)
+    return len(tokenizer.encode(text).ids)
+
+class CandidateShortlister:
+    """
+    Bounded, ranked candidate list for the day-organisation prompt.
+    Ranking combines interest matches, regional coherence (share of the
+    interest-matching POIs in the POI's region) and a greedy diversity
+    penalty for tags already covered by higher ranked candidates.
+    """
+
+    def __init__(self, factor: int = SHORTLIST_FACTOR, token_budget: int = ORGANIZE_POI_LIST_TOKEN_BUDGET):
+        self.factor = factor
+        self.token_budget = token_budget
+
+    @staticmethod
+    def _tags(poi: Dict) -> List[str]:
+        return [tag.strip().lower() for tag in poi['Tags'].split(',') if tag.strip()]
+
+    def shortlist(
+        self, pois: List[Dict], preferences: UserPreferences, relevance: Optional[RelevanceIndex] = None
+    ) -> List[Dict]:
+        needed = preferences.trip_duration * preferences.realization_of_pois_per_day
+        limit = max(needed, needed * self.factor)
+        if len(pois) <= limit:
+            return list(pois)
+
+        if relevance is None:
+            relevance = RelevanceIndex.from_pois(pois)
+        tags = [self._tags(poi) for poi in pois]
+        interest_scores = (
+            relevance.ranking_scores(pois, preferences.interests) / max(len(preferences.interests), 1)
+        ).tolist()
+
+        matching_regions = Counter(
+            poi['AddressRegion'] for poi, score in zip(pois, interest_scores) if score > 0
+        )
+        top_region = max(matching_regions.values()) if matching_regions else 1
+        base_scores = [
+            INTEREST_WEIGHT * score + REGION_WEIGHT * matching_regions.get(poi['AddressRegion'], 0) / top_region
+            for poi, score in zip(pois, interest_scores)
+        ]
+
+        pool = sorted(range(len(pois)), key=lambda i: -base_scores[i])[:limit * POOL_FACTOR]
+        selected = []
+        covered = Counter()
+        while pool and len(selected) < limit:
+            def score(i):
+                overlap = sum(1 for tag in tags[i] if covered[tag]) / max(len(tags[i]), 1)
+                return base_scores[i] - DIVERSITY_WEIGHT * overlap
+            best = max(pool, key=score)
+            pool.remove(best)
+            selected.append(best)
+            covered.update(tags[best])
+        return [pois[i] for i in selected]
+
+    def fit_to_budget(self, lines: List[str], minimum: int, budget: Optional[int] = None) -> int:
+        # How many of the (ranked) prompt lines fit the token budget, never fewer than minimum
+        budget = self.token_budget if budget is None else budget
+        used = 0
+        for count, line in enumerate(lines):
+            used += count_tokens(line + "\n")
+            if used > budget and count >= minimum:
+                return count
+        return len(lines)
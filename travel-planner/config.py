@@ -12,6 +12,7 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 #   "openai-4o-mini"=> GPT-4o-mini (like "gpt-4o-mini-2024-07-18")
 #   "huggingface"   => local HF model
 #   "groq"          => Groq's LLM
+#   "replay"        => responses recorded earlier (see LLM_RECORD_PATH below), no network
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai-3.5")
 
 OPENAI_4O_MINI_MODEL = "gpt-4o-mini"
@@ -33,4 +34,130 @@ MAX_TRIP_DURATION = 14
 # Default time settings
 DEFAULT_START_TIME = "09:00"
 DEFAULT_END_TIME = "18:00"
-BREAK_DURATION = 60  # min
\ No newline at end of file
+BREAK_DURATION = 60  # min
+
+# LLM response cache (in-memory front tier + on-disk SQLite store)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Max number of LLM calls in flight at once across the process: shared by all plans,
+# service threads and batch workers (1 = sequential)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+
+# Batched POI descriptions: POIs per request (1 = one request per POI),
+# prompt size limit before a batch is split, and retry rounds for missing entries
+POI_DESCRIPTION_BATCH_SIZE = int(os.getenv("POI_DESCRIPTION_BATCH_SIZE", "5"))
+POI_DESCRIPTION_BATCH_MAX_CHARS = 6000
+POI_DESCRIPTION_BATCH_RETRIES = 1
+
+# Pre-generated POI descriptions (see pregenerate_descriptions.py).
+# Bump the version when the description prompt changes to ignore older entries.
+POI_DESCRIPTION_STORE_PATH = os.getenv("POI_DESCRIPTION_STORE_PATH", "cache/poi_descriptions.jsonl")
+POI_DESCRIPTION_STORE_VERSION = 1
+
+# Columnar binary snapshots of POI files (rebuilt when the source JSON is newer)
+POI_SNAPSHOT_DIR = os.getenv("POI_SNAPSHOT_DIR", "cache/poi_snapshots")
+
+# Number of pairwise distance matrices kept per POIManager (one per filtered POI set)
+DISTANCE_MATRIX_CACHE_SIZE = 16
+
+# Spatial grid index and "also nearby" suggestions
+SPATIAL_CELL_DEGREES = 0.1
+NEARBY_RADIUS_KM = 25
+NEARBY_LIMIT = 3
+
+# How TravelPlanner groups POIs into days:
+#   "llm"   => ask the LLM (falls back to interest ranking when the answer doesn't parse)
+#   "local" => deterministic geo clustering + route optimization (itinerary_engine.py), no LLM call
+PLANNING_MODE = os.getenv("PLANNING_MODE", "llm").lower()
+
+# Shortlist sent to the LLM by _organize_days: at most SHORTLIST_FACTOR x the POIs needed,
+# and at most ORGANIZE_POI_LIST_TOKEN_BUDGET tokens for the POI list.
+# SHORTLIST_TOKENIZER is a local tokenizer.json path or a Hugging Face hub id (downloaded on
+# first use); empty by default, which estimates tokens from text length and needs no network
+SHORTLIST_FACTOR = 3
+ORGANIZE_POI_LIST_TOKEN_BUDGET = int(os.getenv("ORGANIZE_POI_LIST_TOKEN_BUDGET", "2500"))
+SHORTLIST_TOKENIZER = os.getenv("SHORTLIST_TOKENIZER", "")
+
+# Print plan sections in main.py as they are generated (trip summary token by token)
+STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "true").lower() == "true"
+
+# Local HuggingFace backend: concurrent requests are grouped into one padded
+# generate() call of up to HF_BATCH_SIZE prompts, waiting at most HF_BATCH_WAIT_MS for company
+HF_MICRO_BATCHING = os.getenv("HF_MICRO_BATCHING", "true").lower() == "true"
+HF_BATCH_SIZE = int(os.getenv("HF_BATCH_SIZE", "8"))
+HF_BATCH_WAIT_MS = int(os.getenv("HF_BATCH_WAIT_MS", "20"))
+
+# Reuse of prompt KV caches in the local HuggingFace backend: one entry per system prompt,
+# reused when a new prompt shares at least HF_PREFIX_MIN_TOKENS leading tokens with it
+HF_PREFIX_CACHE_ENABLED = os.getenv("HF_PREFIX_CACHE_ENABLED", "true").lower() == "true"
+HF_PREFIX_CACHE_ENTRIES = 4
+HF_PREFIX_MIN_TOKENS = 16
+
+# Shared keep-alive HTTP client (http_client.py) used for Groq, OpenAI images and image downloads.
+# HTTP2_ENABLED needs the optional "h2" package (pip install httpx[http2]); without it HTTP/1.1 is used
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = 30  # s
+HTTP_CONNECT_TIMEOUT = 10  # s
+HTTP_READ_TIMEOUT = 90  # s
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+# Process-wide pacing of LLM API calls (llm_providers/rate_limiter.py), per provider:
+# (requests per minute, tokens per minute). These are starting values - the limiter
+# adopts the limits reported in x-ratelimit-* response headers and honours Retry-After.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMITS = {
+    "groq": (int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30")), int(os.getenv("GROQ_TOKENS_PER_MINUTE", "6000"))),
+    "openai": (int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500")), int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "30000"))),
+    # Replayed responses: high enough not to pace a benchmark, but injected 429s still pause every caller
+    "replay": (int(os.getenv("REPLAY_REQUESTS_PER_MINUTE", "100000")), int(os.getenv("REPLAY_TOKENS_PER_MINUTE", "100000000"))),
+    "default": (60, 100000),
+}
+# Providers whose x-ratelimit-*-requests headers count requests per day (Groq: RPD, while its
+# token headers are per minute); those headers are not applied to the requests/min bucket
+RATE_LIMIT_DAILY_REQUEST_HEADERS = {"groq"}
+
+# Worker threads of the stage scheduler in main.py (pipeline.py); each stage may fan out
+# further LLM calls of its own, paced by the rate limiter
+PIPELINE_MAX_WORKERS = 6
+
+# Long-running planning service (planning_service.py)
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+# Plans generated at the same time; further /plan requests wait for a free slot
+SERVICE_MAX_CONCURRENT_PLANS = int(os.getenv("SERVICE_MAX_CONCURRENT_PLANS", "4"))
+SERVICE_MAX_BODY_BYTES = 64 * 1024
+
+# Tracing (tracing.py): attach a "_metrics" block (stage timings, LLM calls, tokens,
+# cache hits, retries, fallback) to generated plans; main.py also writes it in
+# Prometheus text format to METRICS_EXPORT_PATH
+TRACE_METRICS = os.getenv("TRACE_METRICS", "true").lower() == "true"
+METRICS_EXPORT_PATH = os.getenv("METRICS_EXPORT_PATH", "output/metrics.prom")
+
+# Record/replay of LLM traffic (llm_providers/replay_provider.py) for offline, reproducible runs.
+# With LLM_RECORD_PATH set, every prompt/response pair of the selected provider is appended to that
+# file (the LLM cache is bypassed while recording, so the file covers the whole run).
+# LLM_PROVIDER="replay" serves them back from LLM_REPLAY_PATH with synthetic latency and
+# injected failures; rates are shares of calls (0.1 = 10%), drawn from LLM_REPLAY_SEED
+LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH", "")
+LLM_REPLAY_PATH = os.getenv("LLM_REPLAY_PATH", "cache/llm_recording.jsonl")
+LLM_REPLAY_LATENCY_MS = float(os.getenv("LLM_REPLAY_LATENCY_MS", "0"))
+LLM_REPLAY_MS_PER_TOKEN = float(os.getenv("LLM_REPLAY_MS_PER_TOKEN", "0"))
+LLM_REPLAY_RATE_LIMIT_RATE = float(os.getenv("LLM_REPLAY_RATE_LIMIT_RATE", "0"))
+LLM_REPLAY_TIMEOUT_RATE = float(os.getenv("LLM_REPLAY_TIMEOUT_RATE", "0"))
+LLM_REPLAY_MALFORMED_DAYS_RATE = float(os.getenv("LLM_REPLAY_MALFORMED_DAYS_RATE", "0"))
+LLM_REPLAY_RETRY_AFTER_SECONDS = float(os.getenv("LLM_REPLAY_RETRY_AFTER_SECONDS", "1"))
+LLM_REPLAY_TIMEOUT_SECONDS = float(os.getenv("LLM_REPLAY_TIMEOUT_SECONDS", "2"))
+LLM_REPLAY_SEED = int(os.getenv("LLM_REPLAY_SEED", "0"))
+
+# Interest matching (relevance_index.py): TF-IDF over character n-grams of tags and tag words.
+# A POI matches an interest when one of its tags contains it or one of its tags (or tag words)
+# is at least RELEVANCE_MIN_SIMILARITY similar ("Castles" => "Castle"). Name words only
+# help ordering, weighted by RELEVANCE_NAME_WEIGHT
+RELEVANCE_MIN_SIMILARITY = float(os.getenv("RELEVANCE_MIN_SIMILARITY", "0.55"))
+RELEVANCE_NGRAM_RANGE = (3, 5)
+RELEVANCE_NAME_WEIGHT = 0.1
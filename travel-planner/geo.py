@@ -0,0 +1,28 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+# Rows computed per block, bounds the temporaries of large matrices
+MATRIX_BLOCK_ROWS = 1024
+
+def haversine(lat1, lon1, lat2, lon2, dtype=np.float64) -> np.ndarray:
+    # Great-circle distance in km, inputs in degrees and broadcast against each other
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=dtype)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))).astype(dtype, copy=False)
+
+def distances_from(lat: float, lon: float, lats, lons, dtype=np.float64) -> np.ndarray:
+    # One-to-many distances, shape (n,)
+    return haversine(lat, lon, lats, lons, dtype)
+
+def distance_matrix(lats, lons, dtype=np.float64) -> np.ndarray:
+    # Symmetric pairwise distances, shape (n, n)
+    lats = np.asarray(lats, dtype=dtype)
+    lons = np.asarray(lons, dtype=dtype)
+    n = len(lats)
+    matrix = np.empty((n, n), dtype=dtype)
+    for start in range(0, n, MATRIX_BLOCK_ROWS):
+        end = min(start + MATRIX_BLOCK_ROWS, n)
+        matrix[start:end] = haversine(lats[start:end, None], lons[start:end, None], lats[None, :], lons[None, :], dtype)
+    np.fill_diagonal(matrix, 0)
+    return matrix
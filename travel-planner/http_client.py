@@ -0,0 +1,51 @@
+import atexit
+import importlib.util
+import threading
+from typing import Optional
+import httpx
+from config import (
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP2_ENABLED
+)
+
+# One pooled client per process: connections (and their TLS sessions) to api.groq.com,
+# api.openai.com and the image CDN are kept alive and reused across calls and threads.
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def timeout(read: float = HTTP_READ_TIMEOUT) -> httpx.Timeout:
+    return httpx.Timeout(read, connect=HTTP_CONNECT_TIMEOUT)
+
+
+def get_http_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http2 = HTTP2_ENABLED
+                if http2 and not http2_available():
+                    print("[HTTP] HTTP2_ENABLED is set but the 'h2' package is missing - using HTTP/1.1")
+                    http2 = False
+                limits = httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                )
+                _client = httpx.Client(limits=limits, timeout=timeout(), http2=http2, follow_redirects=True)
+    return _client
+
+
+def close_http_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_http_client)
@@ -1,5 +1,7 @@
 import os
-import requests
+from typing import Optional
+import httpx
+from http_client import get_http_client, timeout
 
 class ImageGenerator:
     def __init__(self, api_key: str):
@@ -38,19 +40,29 @@ class ImageGenerator:
         }
 
         try:
-            response = requests.post(endpoint, headers=headers, json=data, timeout=60)
+            response = get_http_client().post(endpoint, headers=headers, json=data, timeout=timeout(60))
             response.raise_for_status()
             response_json = response.json()
             return response_json["data"][0]["url"]
-        except requests.HTTPError as http_err:
+        except httpx.HTTPStatusError as http_err:
             print(f"Error generating image: {http_err}")
-            print("Response content:", response.text)
+            print("Response content:", http_err.response.text)
             return None
         except Exception as e:
             print(f"Error generating image: {str(e)}")
             return None
 
-    def save_image_from_url(self, image_url: str, filename: str = "travel_poster.png") -> None:
+    def download_image(self, image_url: str) -> Optional[bytes]:
+        try:
+            response = get_http_client().get(image_url, timeout=timeout(60))
+            if response.status_code == 200:
+                return response.content
+            print(f"Failed to download image. HTTP status code: {response.status_code}")
+        except Exception as e:
+            print(f"Error downloading image: {str(e)}")
+        return None
+
+    def save_image(self, image_data: bytes, filename: str = "travel_poster.png") -> None:
         output_directory = "./output"
         if not os.path.exists(output_directory):
             os.makedirs(output_directory)
@@ -58,13 +70,14 @@ class ImageGenerator:
         file_path = os.path.join(output_directory, filename)
 
         try:
-            print(f"Downloading image from {image_url}...")
-            response = requests.get(image_url, timeout=60)
-            if response.status_code == 200:
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
-                print(f"Image saved as {file_path}")
-            else:
-                print(f"Failed to download image. HTTP status code: {response.status_code}")
+            with open(file_path, 'wb') as f:
+                f.write(image_data)
+            print(f"Image saved as {file_path}")
         except Exception as e:
-            print(f"Error saving image: {str(e)}")
\ No newline at end of file
+            print(f"Error saving image: {str(e)}")
+
+    def save_image_from_url(self, image_url: str, filename: str = "travel_poster.png") -> None:
+        print(f"Downloading image from {image_url}...")
+        image_data = self.download_image(image_url)
+        if image_data is not None:
+            self.save_image(image_data, filename)
@@ -0,0 +1,162 @@
+from typing import Dict, List, Optional
+import numpy as np
+from user_preferences import UserPreferences
+from poi_manager import POIManager
+from relevance_index import relevance_for
+import geo
+
+MAX_CLUSTER_ITERATIONS = 20
+
+class ItineraryEngine:
+    """
+    Local, deterministic day planning.
+    1. Keep the trip_duration * realization_of_pois_per_day best interest matches
+       (ties go to the POIs closest to the must-have ones).
+    2. Split them into day groups of exactly realization_of_pois_per_day POIs
+       with a capacity-constrained k-means over the coordinates.
+    3. Order each day with nearest neighbour + 2-opt, then chain the days so
+       each one starts near where the previous one ended.
+    """
+
+    def __init__(self, poi_manager: Optional[POIManager] = None):
+        # Used for its cached distance matrices when available
+        self.poi_manager = poi_manager
+
+    def organize_days(self, pois: List[Dict], preferences: UserPreferences) -> List[List[Dict]]:
+        per_day = preferences.realization_of_pois_per_day
+        selected = self._select(pois, preferences)
+        if not selected:
+            return []
+
+        # Fewer POIs than needed leaves the last day(s) short, like the simple fallback
+        day_count = min(preferences.trip_duration, -(-len(selected) // per_day))
+        capacities = [per_day] * day_count
+        capacities[-1] = len(selected) - per_day * (day_count - 1)
+
+        lats = np.array([float(poi['Latitude']) for poi in selected])
+        lons = np.array([float(poi['Longitude']) for poi in selected])
+        distances = self._distance_matrix(selected)
+
+        clusters = self._balanced_clusters(lats, lons, capacities)
+        routes = [self._route(cluster, distances) for cluster in clusters]
+        routes = self._chain_days(routes, lats, lons, distances)
+        return [[selected[i] for i in route] for route in routes]
+
+    def _distance_matrix(self, pois: List[Dict]) -> np.ndarray:
+        if self.poi_manager is not None:
+            return self.poi_manager.distance_matrix(pois)
+        lats, lons = POIManager.coordinates(pois)
+        return geo.distance_matrix(lats, lons)
+
+    def _select(self, pois: List[Dict], preferences: UserPreferences) -> List[Dict]:
+        needed = preferences.trip_duration * preferences.realization_of_pois_per_day
+        unique = list({poi['Name']: poi for poi in pois}.values())
+        # Summed tag relevance (matched interests); ties are broken by proximity below
+        relevance = relevance_for(unique, self.poi_manager)
+        scores = relevance.interest_scores(unique, preferences.interests).sum(axis=1).tolist()
+        ranked = sorted(range(len(unique)), key=lambda i: -scores[i])
+        if len(ranked) <= needed:
+            return [unique[i] for i in ranked]
+
+        cutoff = scores[ranked[needed - 1]]
+        keep = [i for i in ranked if scores[i] > cutoff]
+        ties = [i for i in ranked if scores[i] == cutoff]
+        if keep:
+            # Among equally scored POIs prefer the ones near the rest of the trip
+            tie_pois = [unique[i] for i in ties]
+            lats, lons = POIManager.coordinates(tie_pois)
+            keep_lats, keep_lons = POIManager.coordinates([unique[i] for i in keep])
+            spread = geo.distances_from(float(keep_lats.mean()), float(keep_lons.mean()), lats, lons)
+            ties = [ties[j] for j in np.argsort(spread, kind='stable')]
+        return [unique[i] for i in keep + ties[:needed - len(keep)]]
+
+    @staticmethod
+    def _balanced_clusters(lats: np.ndarray, lons: np.ndarray, capacities: List[int]) -> List[List[int]]:
+        n, k = len(lats), len(capacities)
+        if k == 1:
+            return [list(range(n))]
+
+        # Farthest-point seeding, starting from the POI farthest from the centre
+        seeds = [int(np.argmax(geo.distances_from(lats.mean(), lons.mean(), lats, lons)))]
+        while len(seeds) < k:
+            nearest_seed = np.min(
+                [geo.distances_from(lats[s], lons[s], lats, lons) for s in seeds], axis=0
+            )
+            seeds.append(int(np.argmax(nearest_seed)))
+        centers = np.stack((lats[seeds], lons[seeds]), axis=1)
+
+        assignment = None
+        for _ in range(MAX_CLUSTER_ITERATIONS):
+            to_center = geo.haversine(lats[:, None], lons[:, None], centers[None, :, 0], centers[None, :, 1])
+            # Greedy capacity-constrained assignment, closest (POI, day) pairs first
+            new_assignment = np.full(n, -1)
+            free = list(capacities)
+            for flat in np.argsort(to_center, axis=None, kind='stable'):
+                poi_id, cluster = divmod(int(flat), k)
+                if new_assignment[poi_id] == -1 and free[cluster] > 0:
+                    new_assignment[poi_id] = cluster
+                    free[cluster] -= 1
+            if assignment is not None and np.array_equal(assignment, new_assignment):
+                break
+            assignment = new_assignment
+            for cluster in range(k):
+                members = assignment == cluster
+                centers[cluster] = (lats[members].mean(), lons[members].mean())
+
+        return [np.flatnonzero(assignment == cluster).tolist() for cluster in range(k)]
+
+    @staticmethod
+    def _path_length(path: List[int], distances: np.ndarray) -> float:
+        return float(sum(distances[a, b] for a, b in zip(path, path[1:])))
+
+    def _route(self, cluster: List[int], distances: np.ndarray) -> List[int]:
+        # Shortest open path found by nearest neighbour from every start, improved with 2-opt
+        best = None
+        for start in cluster:
+            path = [start]
+            remaining = set(cluster) - {start}
+            while remaining:
+                nearest = min(remaining, key=lambda j: (distances[path[-1], j], j))
+                path.append(nearest)
+                remaining.remove(nearest)
+            path = self._two_opt(path, distances)
+            length = self._path_length(path, distances)
+            if best is None or length < best[0] - 1e-9:
+                best = (length, path)
+        return best[1]
+
+    @staticmethod
+    def _two_opt(path: List[int], distances: np.ndarray) -> List[int]:
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(path) - 1):
+                for j in range(i + 2, len(path) + 1):
+                    # Reverse path[i:j]; open path, so the ends only have one neighbour
+                    before = distances[path[i - 1], path[i]] if i > 0 else 0.0
+                    after = distances[path[j - 1], path[j]] if j < len(path) else 0.0
+                    new_before = distances[path[i - 1], path[j - 1]] if i > 0 else 0.0
+                    new_after = distances[path[i], path[j]] if j < len(path) else 0.0
+                    if new_before + new_after < before + after - 1e-9:
+                        path[i:j] = reversed(path[i:j])
+                        improved = True
+        return path
+
+    @staticmethod
+    def _chain_days(routes: List[List[int]], lats: np.ndarray, lons: np.ndarray, distances: np.ndarray) -> List[List[int]]:
+        # Visit the day groups in nearest-neighbour order, starting at the outermost one,
+        # and flip each day's route so it begins close to where the previous day ended
+        centroids = [(lats[route].mean(), lons[route].mean()) for route in routes]
+        spread = geo.distances_from(lats.mean(), lons.mean(), [c[0] for c in centroids], [c[1] for c in centroids])
+        remaining = list(range(len(routes)))
+        current = remaining.pop(int(np.argmax(spread)))
+        ordered = [routes[current]]
+        while remaining:
+            last = ordered[-1][-1]
+            nearest = min(remaining, key=lambda r: (min(distances[last, routes[r][0]], distances[last, routes[r][-1]]), r))
+            remaining.remove(nearest)
+            route = routes[nearest]
+            if distances[last, route[-1]] < distances[last, route[0]]:
+                route = route[::-1]
+            ordered.append(route)
+        return ordered
@@ -0,0 +1,41 @@
+import importlib
+from typing import Dict, List, Tuple
+from config import OPENAI_4O_MINI_MODEL
+from llm_providers.base import LLMProvider
+
+# LLM_PROVIDER value => (backend module, class name, constructor arguments).
+# Modules are imported on first use, so e.g. torch/transformers are only
+# loaded when "huggingface" is selected.
+PROVIDERS: Dict[str, Tuple[str, str, dict]] = {
+    "openai-3.5": (
+        "llm_providers.openai_provider", "OpenAIProvider",
+        {"name": "openai-3.5", "model_name": "gpt-3.5-turbo", "label": "GPT-3.5"}
+    ),
+    "openai-4": (
+        "llm_providers.openai_provider", "OpenAIProvider",
+        {"name": "openai-4", "model_name": "gpt-4", "label": "GPT-4"}
+    ),
+    "openai-4o-mini": (
+        "llm_providers.openai_provider", "OpenAIProvider",
+        {"name": "openai-4o-mini", "model_name": OPENAI_4O_MINI_MODEL, "label": "GPT-4o-mini"}
+    ),
+    "huggingface": ("llm_providers.huggingface_provider", "HuggingFaceProvider", {}),
+    "groq": ("llm_providers.groq_provider", "GroqProvider", {}),
+    "replay": ("llm_providers.replay_provider", "ReplayProvider", {}),
+}
+
+def provider_names() -> List[str]:
+    return list(PROVIDERS)
+
+def provider_module(name: str) -> str:
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER: {name}")
+    return PROVIDERS[name][0]
+
+def create_provider(name: str) -> LLMProvider:
+    # Imports the backend module of the selected provider and instantiates it
+    module_name, class_name, kwargs = PROVIDERS.get(name, (None, None, None))
+    if module_name is None:
+        raise ValueError(f"Unknown LLM_PROVIDER: {name}")
+    provider_class = getattr(importlib.import_module(module_name), class_name)
+    return provider_class(**kwargs)
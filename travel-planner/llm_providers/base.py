@@ -0,0 +1,23 @@
+from typing import Iterator, List, Tuple
+
+class LLMProvider:
+    """
+    One LLM backend. Subclasses live in their own modules so that heavy
+    client libraries are imported only when that backend is selected.
+    Failures are returned as text starting with "Error" (never cached).
+    """
+    name = ""
+    model_name = ""
+    # False for backends whose answers must not be served from the LLM cache
+    cacheable = True
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        raise NotImplementedError
+
+    def generate_batch(self, prompts: List[Tuple[str, str]]) -> List[str]:
+        # (system_prompt, user_prompt) pairs; backends that can do better override this
+        return [self.generate(system_prompt, user_prompt) for system_prompt, user_prompt in prompts]
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        # Backends without native streaming return the whole answer as one piece
+        yield self.generate(system_prompt, user_prompt)
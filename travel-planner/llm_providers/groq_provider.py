@@ -0,0 +1,161 @@
+import json
+from typing import Iterator
+import httpx
+from config import GROQ_API_KEY, MAX_TOKENS, TEMPERATURE
+from http_client import get_http_client
+import tracing
+from llm_providers.base import LLMProvider
+from llm_providers.rate_limiter import get_rate_limiter, estimate_tokens
+
+GROQ_DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+GROQ_ENDPOINT = "https://api.groq.com/openai/v1/chat/completions"
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self):
+        if not GROQ_API_KEY:
+            raise ValueError("No GROQ_API_KEY found in environment/config.")
+        self.model_name = GROQ_DEFAULT_MODEL
+        self.rate_limiter = get_rate_limiter(self.name)
+        print(f"[TextGenerator] Using Groq model: {self.model_name}")
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        url = GROQ_ENDPOINT
+        headers = {
+            "Authorization": f"Bearer {GROQ_API_KEY}",
+            "Content-Type": "application/json"
+        }
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "max_completion_tokens": MAX_TOKENS,
+            "temperature": TEMPERATURE
+        }
+
+        max_retries = 5
+        backoff_seconds = 2.0
+        # Prompt estimate plus the completion budget, settled against "usage" in the response
+        reserved_tokens = estimate_tokens(system_prompt + user_prompt) + MAX_TOKENS
+
+        client = get_http_client()
+        for attempt in range(max_retries):
+            self.rate_limiter.acquire(reserved_tokens)
+            # Settled in finally; failed attempts (429s, HTTP and transport errors) give the reservation back
+            used_tokens = 0
+            try:
+                response = client.post(url, headers=headers, json=payload)
+                self.rate_limiter.update_from_headers(response.headers)
+                response.raise_for_status()
+                data = response.json()
+                usage = data.get("usage") or {}
+                used_tokens = usage.get("total_tokens", reserved_tokens)
+                tracing.record(
+                    prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0)
+                )
+                return data["choices"][0]["message"]["content"].strip()
+
+            except httpx.HTTPStatusError as http_err:
+                response = http_err.response
+                # If 429 rate limit, pause every caller for Retry-After (or the reset time) and try again
+                if response.status_code == 429 and attempt < max_retries - 1:
+                    delay = self.rate_limiter.retry_delay(response.headers, backoff_seconds)
+                    print(f"[Groq Rate Limit] Attempt {attempt+1}/{max_retries} - waiting {delay:.1f}s")
+                    self.rate_limiter.block_for(delay)
+                    tracing.record(retries=1)
+                    backoff_seconds *= 2
+                    continue
+                else:
+                    print(f"[Groq HTTP Error] {http_err}")
+                    print(f"Response content: {response.text}")
+                    return "Error: unable to get response from Groq."
+            except Exception as e:
+                print(f"[Groq Error] {str(e)}")
+                return "Error: unexpected issue in Groq request."
+            finally:
+                self.rate_limiter.record_usage(reserved_tokens, used_tokens)
+
+        return "Error: max retries exceeded for Groq"
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        # Server-sent events: "data: {json chunk}" lines, terminated by "data: [DONE]"
+        url = GROQ_ENDPOINT
+        headers = {
+            "Authorization": f"Bearer {GROQ_API_KEY}",
+            "Content-Type": "application/json"
+        }
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "max_completion_tokens": MAX_TOKENS,
+            "temperature": TEMPERATURE,
+            "stream": True
+        }
+
+        max_retries = 5
+        backoff_seconds = 2.0
+
+        reserved_tokens = estimate_tokens(system_prompt + user_prompt) + MAX_TOKENS
+
+        client = get_http_client()
+        for attempt in range(max_retries):
+            self.rate_limiter.acquire(reserved_tokens)
+            used_tokens = 0
+            try:
+                with client.stream("POST", url, headers=headers, json=payload) as response:
+                    self.rate_limiter.update_from_headers(response.headers)
+                    if response.status_code == 429 and attempt < max_retries - 1:
+                        delay = self.rate_limiter.retry_delay(response.headers, backoff_seconds)
+                        print(f"[Groq Rate Limit] Attempt {attempt+1}/{max_retries} - waiting {delay:.1f}s")
+                        self.rate_limiter.block_for(delay)
+                        tracing.record(retries=1)
+                        backoff_seconds *= 2
+                        continue
+                    if response.status_code >= 400:
+                        print(f"[Groq HTTP Error] {response.status_code}")
+                        print(f"Response content: {response.read().decode(errors='replace')}")
+                        yield "Error: unable to get response from Groq."
+                        return
+
+                    # Accepted: the estimate stands until the last chunk reports the usage
+                    used_tokens = reserved_tokens
+                    for line in response.iter_lines():
+                        if not line or not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            # read to the end of the body so the connection goes back to the pool
+                            continue
+                        chunk = json.loads(data)
+                        # Groq reports usage on the last chunk under "x_groq"
+                        usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+                        if usage:
+                            used_tokens = usage.get("total_tokens", reserved_tokens)
+                            tracing.record(
+                                prompt_tokens=usage.get("prompt_tokens", 0),
+                                completion_tokens=usage.get("completion_tokens", 0)
+                            )
+                        choices = chunk.get("choices") or []
+                        content = choices[0].get("delta", {}).get("content") if choices else None
+                        if content:
+                            yield content
+                    return
+            except Exception as e:
+                print(f"[Groq Error] {str(e)}")
+                yield "Error: unexpected issue in Groq request."
+                return
+            finally:
+                self.rate_limiter.record_usage(reserved_tokens, used_tokens)
+
+        yield "Error: max retries exceeded for Groq"
@@ -0,0 +1,151 @@
+import threading
+from typing import Iterator, List, Tuple
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM, GenerationConfig, TextIteratorStreamer, DynamicCache
+from config import (
+    HUGGINGFACE_LLAMA_MODEL,
+    TEMPERATURE,
+    HF_MICRO_BATCHING,
+    HF_BATCH_SIZE,
+    HF_BATCH_WAIT_MS,
+    HF_PREFIX_CACHE_ENABLED,
+    HF_PREFIX_CACHE_ENTRIES,
+    HF_PREFIX_MIN_TOKENS
+)
+from llm_providers.base import LLMProvider
+from llm_providers.micro_batcher import MicroBatcher
+from llm_providers.prefix_cache import PrefixKVCache
+import tracing
+
+class HuggingFaceProvider(LLMProvider):
+    name = "huggingface"
+
+    def __init__(self):
+        print(f"[TextGenerator] Loading local HuggingFace model: {HUGGINGFACE_LLAMA_MODEL} ...")
+        self.model_name = HUGGINGFACE_LLAMA_MODEL
+        self.tokenizer = AutoTokenizer.from_pretrained(HUGGINGFACE_LLAMA_MODEL)
+        self.model = AutoModelForCausalLM.from_pretrained(
+            HUGGINGFACE_LLAMA_MODEL,
+            device_map="auto",
+            torch_dtype=torch.float16
+        )
+        self.generation_config = GenerationConfig(
+            max_new_tokens=512,
+            temperature=TEMPERATURE
+        )
+        print("[TextGenerator] Model loaded successfully (HF).")
+
+        # Batches are left-padded so every prompt ends right where generation starts
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.batcher = MicroBatcher(self.generate_batch, HF_BATCH_SIZE, HF_BATCH_WAIT_MS) if HF_MICRO_BATCHING else None
+        # Shared system prompt / instruction prefixes are prefilled once and reused
+        self.prefix_cache = PrefixKVCache(HF_PREFIX_CACHE_ENTRIES, HF_PREFIX_MIN_TOKENS) \
+            if HF_PREFIX_CACHE_ENABLED else None
+
+    @staticmethod
+    def _combined_prompt(system_prompt: str, user_prompt: str) -> str:
+        return f"System: {system_prompt}\nUser: {user_prompt}\nAssistant:"
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        if self.batcher is not None:
+            # Concurrent callers share one forward pass; it runs on the batcher thread,
+            # so token counts are recorded here, on the caller's side
+            text = self.batcher.submit((system_prompt, user_prompt)).result()
+            if tracing.current_trace() is not None:
+                tracing.record(
+                    prompt_tokens=len(self.tokenizer(self._combined_prompt(system_prompt, user_prompt))["input_ids"]),
+                    completion_tokens=len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+                )
+            return text
+        return self._generate_single(system_prompt, user_prompt)
+
+    def generate_batch(self, prompts: List[Tuple[str, str]]) -> List[str]:
+        # Many prompts, one padded generate() call per HF_BATCH_SIZE of them
+        texts = []
+        for start in range(0, len(prompts), HF_BATCH_SIZE):
+            chunk = prompts[start:start + HF_BATCH_SIZE]
+            if len(chunk) == 1:
+                texts.append(self._generate_single(*chunk[0]))
+            else:
+                texts.extend(self._generate_padded(chunk))
+        return texts
+
+    def _generate_padded(self, prompts: List[Tuple[str, str]]) -> List[str]:
+        combined_prompts = [self._combined_prompt(system_prompt, user_prompt) for system_prompt, user_prompt in prompts]
+        inputs = self.tokenizer(combined_prompts, return_tensors="pt", padding=True).to(self.model.device)
+
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=self.generation_config.max_new_tokens,
+                temperature=self.generation_config.temperature,
+                pad_token_id=self.tokenizer.pad_token_id
+            )
+
+        prompt_length = inputs["input_ids"].shape[1]
+        new_tokens = outputs[:, prompt_length:]
+        tracing.record(
+            prompt_tokens=int(inputs["attention_mask"].sum()),
+            completion_tokens=int((new_tokens != self.tokenizer.pad_token_id).sum())
+        )
+        texts = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        return [text.strip() for text in texts]
+
+    def _generate_single(self, system_prompt: str, user_prompt: str) -> str:
+        combined_prompt = self._combined_prompt(system_prompt, user_prompt)
+        inputs = self.tokenizer(combined_prompt, return_tensors="pt").to(self.model.device)
+        input_ids = inputs["input_ids"][0]
+
+        past_key_values = None
+        if self.prefix_cache is not None:
+            past_key_values, _ = self.prefix_cache.lookup(system_prompt, input_ids)
+            # An explicit Cache object also makes generate() hand the prompt cache back as one
+            past_key_values = past_key_values if past_key_values is not None else DynamicCache()
+
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=self.generation_config.max_new_tokens,
+                temperature=self.generation_config.temperature,
+                past_key_values=past_key_values,
+                return_dict_in_generate=True
+            )
+
+        if self.prefix_cache is not None:
+            self.prefix_cache.store(system_prompt, input_ids, outputs.past_key_values)
+        tracing.record(prompt_tokens=len(input_ids), completion_tokens=outputs.sequences.shape[1] - len(input_ids))
+
+        text = self.tokenizer.decode(outputs.sequences[0], skip_special_tokens=True)
+        if "Assistant:" in text:
+            text = text.split("Assistant:")[-1]
+        return text.strip()
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        combined_prompt = self._combined_prompt(system_prompt, user_prompt)
+        inputs = self.tokenizer(combined_prompt, return_tensors="pt").to(self.model.device)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+
+        def run_generate():
+            with torch.no_grad():
+                self.model.generate(
+                    **inputs,
+                    max_new_tokens=self.generation_config.max_new_tokens,
+                    temperature=self.generation_config.temperature,
+                    streamer=streamer
+                )
+
+        # generate() fills the streamer from a worker thread while we read from it
+        worker = threading.Thread(target=run_generate, daemon=True)
+        worker.start()
+        parts = []
+        for text in streamer:
+            if text:
+                parts.append(text)
+                yield text
+        worker.join()
+        tracing.record(
+            prompt_tokens=inputs["input_ids"].shape[1],
+            completion_tokens=len(self.tokenizer("".join(parts), add_special_tokens=False)["input_ids"])
+        )
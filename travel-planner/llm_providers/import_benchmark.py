@@ -0,0 +1,71 @@
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from llm_providers import PROVIDERS
+
+# Runs in a fresh interpreter: import time and peak RSS of one module
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "max_rss_kb": rss if sys.platform != "darwin" else rss // 1024}}))
+"""
+
+def measure(module: str, runs: int) -> dict:
+    # Cold-start cost: median over several fresh interpreters
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+            return {"module": module, "error": error}
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {
+        "module": module,
+        "seconds": statistics.median(sample["seconds"] for sample in samples),
+        "max_rss_mb": statistics.median(sample["max_rss_kb"] for sample in samples) / 1024
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import cost of each LLM provider backend.")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per module")
+    parser.add_argument("--json", action="store_true", help="print raw JSON instead of a table")
+    args = parser.parse_args()
+
+    targets = [("(baseline)", "config"), ("(facade)", "text_generator")]
+    seen = set()
+    for name, (module, _, _) in PROVIDERS.items():
+        if module not in seen:
+            seen.add(module)
+            targets.append((name, module))
+
+    results = []
+    for name, module in targets:
+        result = measure(module, args.runs)
+        result["provider"] = name
+        results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'provider':<16} {'module':<38} {'import':>10} {'peak RSS':>10}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['provider']:<16} {result['module']:<38} {'error: ' + result['error']}")
+        else:
+            print(
+                f"{result['provider']:<16} {result['module']:<38} "
+                f"{result['seconds'] * 1000:>8.0f}ms {result['max_rss_mb']:>8.1f}MB"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads and hands them to batch_fn
+    in groups: a batch is flushed once it holds max_batch_size items or
+    max_wait_ms after its first item arrived, whichever comes first.
+    batch_fn must return one result per item, in order.
+    """
+
+    def __init__(self, batch_fn: Callable[[List], List], max_batch_size: int, max_wait_ms: int):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
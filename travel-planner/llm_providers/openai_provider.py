@@ -0,0 +1,89 @@
+from typing import Iterator
+import openai
+from config import OPENAI_API_KEY, MAX_TOKENS, TEMPERATURE
+from llm_providers.base import LLMProvider
+from llm_providers.rate_limiter import get_rate_limiter, estimate_tokens
+import tracing
+
+class OpenAIProvider(LLMProvider):
+    def __init__(self, name: str, model_name: str, label: str):
+        self.name = name
+        self.model_name = model_name
+        self.rate_limiter = get_rate_limiter(name)
+        openai.api_key = OPENAI_API_KEY
+        print(f"[TextGenerator] Using OpenAI {label}")
+
+    def _messages(self, system_prompt: str, user_prompt: str) -> list:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def _used_tokens(self, reserved_tokens: int, usage) -> int:
+        # Tokens to settle the reservation with: the reported usage, else the estimate
+        if usage is None:
+            return reserved_tokens
+        tracing.record(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        return usage.total_tokens
+
+    def _rate_limited(self, error: openai.RateLimitError) -> None:
+        # The SDK has already retried; make every other caller wait out the limit too
+        self.rate_limiter.update_from_headers(error.response.headers)
+        self.rate_limiter.block_for(self.rate_limiter.retry_delay(error.response.headers, 1.0))
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        reserved_tokens = estimate_tokens(system_prompt + user_prompt) + MAX_TOKENS
+        self.rate_limiter.acquire(reserved_tokens)
+        # Settled in finally; a request that failed gives its reservation back
+        used_tokens = 0
+        try:
+            raw = openai.chat.completions.with_raw_response.create(
+                model=self.model_name,
+                messages=self._messages(system_prompt, user_prompt),
+                max_tokens=MAX_TOKENS,
+                temperature=TEMPERATURE
+            )
+            self.rate_limiter.update_from_headers(raw.headers)
+            response = raw.parse()
+            used_tokens = self._used_tokens(reserved_tokens, response.usage)
+            return response.choices[0].message.content.strip()
+        except openai.RateLimitError as e:
+            self._rate_limited(e)
+            print(f"[OpenAI Rate Limit] {str(e)}")
+            return "Error: unable to get response from OpenAI."
+        except Exception as e:
+            print(f"[OpenAI Error] {str(e)}")
+            return "Error: unable to get response from OpenAI."
+        finally:
+            self.rate_limiter.record_usage(reserved_tokens, used_tokens)
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        reserved_tokens = estimate_tokens(system_prompt + user_prompt) + MAX_TOKENS
+        self.rate_limiter.acquire(reserved_tokens)
+        used_tokens = 0
+        try:
+            raw = openai.chat.completions.with_raw_response.create(
+                model=self.model_name,
+                messages=self._messages(system_prompt, user_prompt),
+                max_tokens=MAX_TOKENS,
+                temperature=TEMPERATURE,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            self.rate_limiter.update_from_headers(raw.headers)
+            # Accepted: the estimate stands until the final chunk reports the usage
+            used_tokens = reserved_tokens
+            for chunk in raw.parse():
+                if chunk.usage:
+                    used_tokens = self._used_tokens(reserved_tokens, chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except openai.RateLimitError as e:
+            self._rate_limited(e)
+            print(f"[OpenAI Rate Limit] {str(e)}")
+            yield "Error: unable to get response from OpenAI."
+        except Exception as e:
+            print(f"[OpenAI Error] {str(e)}")
+            yield "Error: unable to get response from OpenAI."
+        finally:
+            self.rate_limiter.record_usage(reserved_tokens, used_tokens)
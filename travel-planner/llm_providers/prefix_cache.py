@@ -0,0 +1,62 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+import torch
+
+class PrefixKVCache:
+    """
+    Past-key-values of recent prompts, one entry per key (the system prompt).
+    A new prompt reuses the entry cropped to the longest token prefix it
+    shares with it, so only the differing suffix needs prefill. Each
+    generation then stores its own prompt cache as the new entry.
+    """
+
+    def __init__(self, max_entries: int, min_tokens: int):
+        self.max_entries = max_entries
+        self.min_tokens = min_tokens
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str, input_ids: torch.Tensor) -> Tuple[Optional[object], int]:
+        # (private copy of the cached KV cropped to the shared prefix, prefix length) or (None, 0)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self.misses += 1
+            return None, 0
+
+        cached_ids, cache = entry
+        # At least one prompt token must remain to be prefilled
+        length = min(len(cached_ids), len(input_ids) - 1)
+        mismatch = torch.nonzero(cached_ids[:length] != input_ids[:length])
+        shared = int(mismatch[0]) if len(mismatch) else length
+        if shared < self.min_tokens:
+            self.misses += 1
+            return None, 0
+
+        # generate() extends the cache in place, so callers get their own copy
+        cache = copy.deepcopy(cache)
+        cache.crop(shared)
+        self.hits += 1
+        self.reused_tokens += shared
+        return cache, shared
+
+    def store(self, key: str, input_ids: torch.Tensor, cache) -> None:
+        # Keep only the prompt part of a finished generation's cache
+        if cache is None or not hasattr(cache, "crop"):
+            return
+        cache.crop(len(input_ids))
+        with self._lock:
+            self._entries[key] = (input_ids.detach().clone(), cache)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "reused_tokens": self.reused_tokens}
@@ -0,0 +1,207 @@
+import re
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+from config import RATE_LIMIT_ENABLED, RATE_LIMITS, RATE_LIMIT_DAILY_REQUEST_HEADERS
+
+# "6m0s", "2m59.56s", "7.66s", "120ms" as sent in x-ratelimit-reset-* headers
+DURATION_PART_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After is either delay-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough prompt size (~4 characters per token); corrected by record_usage()
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    capacity units per minute, refilled continuously. Not thread-safe on its
+    own - RateLimiter holds the lock.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        rate = self.capacity / 60.0
+        self.available = min(self.capacity, self.available + (now - self.updated) * rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A single request larger than the bucket is let through once the bucket is full
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / (self.capacity / 60.0)
+
+    def take(self, amount: float) -> None:
+        self.available -= amount
+
+    def give_back(self, amount: float) -> None:
+        self.available = min(self.capacity, self.available + amount)
+
+    def sync(self, limit: Optional[int], remaining: Optional[int], now: float) -> None:
+        # The server's view wins: it also counts requests made by other processes
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.available = min(self.available, float(remaining))
+
+
+class RateLimiter:
+    """
+    Process-wide pacing for one provider: a requests/min and a tokens/min
+    bucket shared by every thread, adjusted from x-ratelimit-* response
+    headers, plus a Retry-After pause that blocks all callers.
+    """
+
+    def __init__(
+        self, name: str, requests_per_minute: int, tokens_per_minute: int, daily_request_headers: bool = False
+    ):
+        self.name = name
+        # The provider's request headers are per day: the requests/min bucket keeps its configured rate
+        self.daily_request_headers = daily_request_headers
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self.waited_seconds = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens: int) -> None:
+        # Blocks until one request of estimated_tokens fits into both buckets, then reserves it
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(
+                    self.blocked_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(estimated_tokens, now)
+                )
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(estimated_tokens)
+                    return
+                self.waited_seconds += wait
+            time.sleep(wait)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        # Settles the reservation made by acquire() once the real usage is known
+        if actual_tokens is None:
+            return
+        with self._lock:
+            if actual_tokens < estimated_tokens:
+                self.tokens.give_back(estimated_tokens - actual_tokens)
+            else:
+                self.tokens.take(actual_tokens - estimated_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        def header_int(key: str) -> Optional[int]:
+            try:
+                return int(float(headers.get(key)))
+            except (TypeError, ValueError):
+                return None
+
+        with self._lock:
+            now = time.monotonic()
+            if not self.daily_request_headers:
+                self.requests.sync(
+                    header_int("x-ratelimit-limit-requests"),
+                    header_int("x-ratelimit-remaining-requests"),
+                    now
+                )
+            self.tokens.sync(
+                header_int("x-ratelimit-limit-tokens"),
+                header_int("x-ratelimit-remaining-tokens"),
+                now
+            )
+
+    def block_for(self, seconds: float) -> None:
+        # After a 429: nobody sends anything for the next `seconds`
+        with self._lock:
+            self.throttled += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def retry_delay(self, headers: Mapping[str, str], fallback: float) -> float:
+        # Seconds to pause after a 429: Retry-After, else the token/request reset, else fallback
+        delay = parse_retry_after(headers.get("retry-after"))
+        if delay is None:
+            resets = [parse_duration(headers.get("x-ratelimit-reset-tokens"))]
+            if not self.daily_request_headers:
+                # For daily request limits this is the time until the day resets
+                resets.append(parse_duration(headers.get("x-ratelimit-reset-requests")))
+            resets = [reset for reset in resets if reset]
+            delay = max(resets) if resets else fallback
+        return delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                "requests_per_minute": int(self.requests.capacity),
+                "tokens_per_minute": int(self.tokens.capacity),
+                "requests_available": int(self.requests.available),
+                "tokens_available": int(self.tokens.available),
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 2)
+            }
+
+
+class NoRateLimiter(RateLimiter):
+    # Used when RATE_LIMIT_ENABLED is off: acquire() never waits
+    def acquire(self, estimated_tokens: int) -> None:
+        return
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    # One limiter per provider name, shared by every TextGenerator in the process
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            family = name.split("-")[0]
+            requests_per_minute, tokens_per_minute = RATE_LIMITS.get(name, RATE_LIMITS.get(family, RATE_LIMITS["default"]))
+            limiter_class = RateLimiter if RATE_LIMIT_ENABLED else NoRateLimiter
+            daily_request_headers = name in RATE_LIMIT_DAILY_REQUEST_HEADERS or family in RATE_LIMIT_DAILY_REQUEST_HEADERS
+            limiter = limiter_class(name, requests_per_minute, tokens_per_minute, daily_request_headers)
+            _limiters[name] = limiter
+        return limiter
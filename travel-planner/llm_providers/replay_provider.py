@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Dict, Iterator, List, Tuple
+from config import (
+    LLM_REPLAY_PATH, LLM_REPLAY_LATENCY_MS, LLM_REPLAY_MS_PER_TOKEN, LLM_REPLAY_SEED,
+    LLM_REPLAY_RATE_LIMIT_RATE, LLM_REPLAY_TIMEOUT_RATE, LLM_REPLAY_MALFORMED_DAYS_RATE,
+    LLM_REPLAY_RETRY_AFTER_SECONDS, LLM_REPLAY_TIMEOUT_SECONDS
+)
+import tracing
+from llm_providers.base import LLMProvider
+from llm_providers.rate_limiter import get_rate_limiter, estimate_tokens
+
+# Offline LLM traffic for reproducible performance tests:
+#   LLM_RECORD_PATH=cache/llm_recording.jsonl LLM_PROVIDER=groq python main.py   record a run
+#   LLM_PROVIDER=replay python main.py                                            replay it
+# One JSON object per line: {"key", "provider", "model", "system_prompt", "user_prompt", "response"}
+
+DAY_HEADER_PATTERN = re.compile(r"^\W*day\s+\d+", re.IGNORECASE)
+
+
+def recording_key(system_prompt: str, user_prompt: str) -> str:
+    # Independent of the provider, so a Groq recording can be replayed for any configuration
+    payload = json.dumps([system_prompt, user_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordingProvider(LLMProvider):
+    """
+    Wraps the selected backend and appends every successful prompt/response
+    pair to a JSONL file that ReplayProvider can serve later.
+    """
+    # Cache hits would be missing from the recording
+    cacheable = False
+
+    def __init__(self, backend: LLMProvider, path: str):
+        self.backend = backend
+        self.name = backend.name
+        self.model_name = backend.model_name
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        print(f"[TextGenerator] Recording LLM responses to {path}")
+
+    def _record(self, system_prompt: str, user_prompt: str, response: str) -> None:
+        if not response or response.startswith("Error"):
+            return
+        line = json.dumps({
+            "key": recording_key(system_prompt, user_prompt),
+            "provider": self.name,
+            "model": self.model_name,
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt,
+            "response": response
+        }, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        text = self.backend.generate(system_prompt, user_prompt)
+        self._record(system_prompt, user_prompt, text)
+        return text
+
+    def generate_batch(self, prompts: List[Tuple[str, str]]) -> List[str]:
+        texts = self.backend.generate_batch(prompts)
+        for (system_prompt, user_prompt), text in zip(prompts, texts):
+            self._record(system_prompt, user_prompt, text)
+        return texts
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        parts = []
+        for chunk in self.backend.stream(system_prompt, user_prompt):
+            parts.append(chunk)
+            yield chunk
+        if not any(part.startswith("Error") for part in parts):
+            self._record(system_prompt, user_prompt, "".join(parts).strip())
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Serves recorded responses by prompt, with synthetic latency and injected
+    failures: 429s (paced through the shared rate limiter and retried like
+    Groq), timeouts, and day lists with a day or an activity missing. The
+    failures are drawn per prompt, request and attempt from LLM_REPLAY_SEED,
+    so a run fails the same way each time regardless of thread scheduling,
+    and the n-th served request with a prompt gets its n-th recorded response.
+    """
+    name = "replay"
+    # Responses are already on disk; the LLM cache would only hide latency and failures
+    cacheable = False
+
+    def __init__(
+        self,
+        path: str = LLM_REPLAY_PATH,
+        latency_ms: float = LLM_REPLAY_LATENCY_MS,
+        ms_per_token: float = LLM_REPLAY_MS_PER_TOKEN,
+        rate_limit_rate: float = LLM_REPLAY_RATE_LIMIT_RATE,
+        timeout_rate: float = LLM_REPLAY_TIMEOUT_RATE,
+        malformed_days_rate: float = LLM_REPLAY_MALFORMED_DAYS_RATE,
+        seed: int = LLM_REPLAY_SEED
+    ):
+        if not os.path.exists(path):
+            raise ValueError(f"No LLM recording found at {path} (record one with LLM_RECORD_PATH).")
+        self.path = path
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.malformed_days_rate = malformed_days_rate
+        self.seed = seed
+        self.rate_limiter = get_rate_limiter(self.name)
+        # key => recorded responses, served in turn when a prompt was recorded more than once
+        self.responses: Dict[str, List[str]] = {}
+        self.model_name = self.name
+        self._requests: Dict[str, int] = {}
+        self._occurrences: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"served": 0, "missing": 0, "rate_limited": 0, "timeouts": 0, "malformed_days": 0}
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = entry.get("key") or recording_key(entry["system_prompt"], entry["user_prompt"])
+                self.responses.setdefault(key, []).append(entry["response"])
+                if self.model_name == self.name and entry.get("model"):
+                    self.model_name = f"replay:{entry['model']}"
+        print(f"[TextGenerator] Replaying {sum(len(r) for r in self.responses.values())} LLM responses from {path}")
+
+    def _next_request(self, key: str) -> int:
+        # The n-th request with this prompt always draws the same injected failures
+        with self._lock:
+            request = self._requests.get(key, 0)
+            self._requests[key] = request + 1
+        return request
+
+    def _next_response(self, key: str, recorded: List[str]) -> str:
+        # Recorded responses are consumed in order by the requests actually served, so
+        # injected failures (and the caller's retries after them) don't skip any
+        with self._lock:
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+        return recorded[occurrence % len(recorded)]
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _respond(self, system_prompt: str, user_prompt: str) -> Tuple[str, float]:
+        # (response, per-token delay in seconds) after the request latency, 429 retries and timeouts
+        key = recording_key(system_prompt, user_prompt)
+        max_retries = 5
+        backoff_seconds = LLM_REPLAY_RETRY_AFTER_SECONDS
+        reserved_tokens = estimate_tokens(system_prompt + user_prompt)
+
+        request = self._next_request(key)
+        for attempt in range(max_retries):
+            rng = random.Random(f"{self.seed}:{key}:{request}:{attempt}")
+            self.rate_limiter.acquire(reserved_tokens)
+            time.sleep(self.latency_ms / 1000.0)
+
+            if rng.random() < self.rate_limit_rate:
+                self._count("rate_limited")
+                if attempt < max_retries - 1:
+                    print(f"[Replay Rate Limit] Attempt {attempt+1}/{max_retries} - waiting {backoff_seconds:.1f}s")
+                    self.rate_limiter.block_for(backoff_seconds)
+                    tracing.record(retries=1)
+                    backoff_seconds *= 2
+                    continue
+                return "Error: max retries exceeded for replay", 0.0
+            if rng.random() < self.timeout_rate:
+                self._count("timeouts")
+                time.sleep(LLM_REPLAY_TIMEOUT_SECONDS)
+                print("[Replay Error] The read operation timed out")
+                return "Error: unexpected issue in replay request.", 0.0
+
+            recorded = self.responses.get(key)
+            if not recorded:
+                self._count("missing")
+                print("[Replay Error] No recorded response for this prompt")
+                return "Error: no recorded response for this prompt.", 0.0
+            response = self._next_response(key, recorded)
+            if rng.random() < self.malformed_days_rate:
+                response = self._malformed_days(response, rng)
+
+            self._count("served")
+            completion_tokens = estimate_tokens(response)
+            tracing.record(prompt_tokens=reserved_tokens, completion_tokens=completion_tokens)
+            return response, self.ms_per_token / 1000.0
+
+        return "Error: max retries exceeded for replay", 0.0
+
+    def _malformed_days(self, response: str, rng: random.Random) -> str:
+        # Drops the last day or one activity of a day list, which sends the planner to its fallback
+        lines = response.split("\n")
+        headers = [i for i, line in enumerate(lines) if DAY_HEADER_PATTERN.match(line.strip())]
+        if not headers:
+            return response
+        self._count("malformed_days")
+        if len(headers) > 1 and rng.random() < 0.5:
+            return "\n".join(lines[:headers[-1]])
+        day = rng.randrange(len(headers))
+        end = headers[day + 1] if day + 1 < len(headers) else len(lines)
+        activities = [i for i in range(headers[day] + 1, end) if lines[i].strip()]
+        if not activities:
+            return response
+        drop = rng.choice(activities)
+        return "\n".join(line for i, line in enumerate(lines) if i != drop)
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        response, token_delay = self._respond(system_prompt, user_prompt)
+        time.sleep(token_delay * estimate_tokens(response))
+        return response
+
+    def stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        # Word by word, spread over the simulated generation time
+        response, token_delay = self._respond(system_prompt, user_prompt)
+        if response.startswith("Error"):
+            yield response
+            return
+        for piece in re.findall(r"\s*\S+", response):
+            time.sleep(token_delay * estimate_tokens(piece))
+            yield piece
@@ -1,11 +1,14 @@
 import os
 import json
-from config import OPENAI_API_KEY, POI_DATA_FILE
+import queue
+from config import OPENAI_API_KEY, POI_DATA_FILE, STREAM_OUTPUT, TRACE_METRICS, METRICS_EXPORT_PATH
 from travel_planner import TravelPlanner
 from poi_manager import POIManager
 from user_preferences import UserPreferences
 from image_generator import ImageGenerator
 from text_generator import TextGenerator
+from pipeline import StageScheduler
+import tracing
 
 def get_openai_api_key():
     api_key = OPENAI_API_KEY
@@ -139,6 +142,48 @@ def get_user_input():
         budget_level=budget
     )
 
+def print_interests_analysis(interests_accuracy):
+    print("\n" + "=" * 50 + "\n")
+    print("Interests Analysis:")
+    print("-" * 20)
+    print(f"Overall accuracy: {interests_accuracy['overall_accuracy']}%")
+
+    usage = interests_accuracy['interests_usage']
+    print(
+        f"\nInterests usage: {usage['used']}/{usage['total']} "
+        f"({usage['percentage']}%)"
+    )
+
+    print("\nAccuracy per interest:")
+    for interest, accuracy in interests_accuracy['accuracy_per_interest'].items():
+        print(f"- {interest}: {accuracy}%")
+    print(f"\nTotal POIs in plan: {interests_accuracy['total_pois']}")
+    print(f"Total interest matches found: {interests_accuracy['matches_found']}")
+    print("\n" + "=" * 50 + "\n")
+
+def print_day(day):
+    print(f"Day {day['day_number']}:")
+    print("-" * 20)
+    print(f"Summary: {day['day_summary']}\n")
+
+    for idx, activity in enumerate(day['activities'], 1):
+        print(f"{idx}. {activity['name']}")
+        print(f"   Location: {activity['location']}")
+        print(f"   Description: {activity['description']}")
+        if 'timing' in activity:
+            print(f"   Suggested timing: {activity['timing']}")
+        if activity.get('also_nearby'):
+            nearby = ", ".join(f"{item['name']} ({item['distance_km']} km)" for item in activity['also_nearby'])
+            print(f"   Also nearby: {nearby}")
+        print()
+    print("-" * 50)
+
+def print_general_tips(general_tips):
+    print("\nGeneral Tips for Your Trip:")
+    print("-" * 20)
+    print(general_tips)
+    print("\n" + "=" * 50)
+
 def display_travel_plan(plan, image_url=None):
     print("\n" + "=" * 50)
     print("YOUR IRELAND TRAVEL PLAN")
@@ -152,42 +197,40 @@ def display_travel_plan(plan, image_url=None):
         print("\nGenerated Travel Poster:")
         print(image_url)
 
-    print("\n" + "=" * 50 + "\n")
-    print("Interests Analysis:")
-    print("-" * 20)
-    print(f"Overall accuracy: {plan['interests_accuracy']['overall_accuracy']}%")
+    print_interests_analysis(plan['interests_accuracy'])
 
-    usage = plan['interests_accuracy']['interests_usage']
-    print(
-        f"\nInterests usage: {usage['used']}/{usage['total']} "
-        f"({usage['percentage']}%)"
-    )
+    for day in plan['days']:
+        print_day(day)
 
-    print("\nAccuracy per interest:")
-    for interest, accuracy in plan['interests_accuracy']['accuracy_per_interest'].items():
-        print(f"- {interest}: {accuracy}%")
-    print(f"\nTotal POIs in plan: {plan['interests_accuracy']['total_pois']}")
-    print(f"Total interest matches found: {plan['interests_accuracy']['matches_found']}")
-    print("\n" + "=" * 50 + "\n")
+    print_general_tips(plan['general_tips'])
 
-    for day in plan['days']:
-        print(f"Day {day['day_number']}:")
-        print("-" * 20)
-        print(f"Summary: {day['day_summary']}\n")
-
-        for idx, activity in enumerate(day['activities'], 1):
-            print(f"{idx}. {activity['name']}")
-            print(f"   Location: {activity['location']}")
-            print(f"   Description: {activity['description']}")
-            if 'timing' in activity:
-                print(f"   Suggested timing: {activity['timing']}")
-            print()
-        print("-" * 50)
+def drain(items, stage_done):
+    # Items put on the queue by a running stage, as they arrive, until the stage is done
+    while True:
+        try:
+            yield items.get(timeout=0.1)
+        except queue.Empty:
+            if stage_done() and items.empty():
+                return
+
+def display_travel_plan_stages(scheduler, summary_pieces, day_plans):
+    # Renders the plan section by section while the scheduler is still running:
+    # the trip summary piece by piece from summary_pieces, each day from day_plans as soon
+    # as it is complete, then the other stage results once they are done
+    print("\n" + "=" * 50)
+    print("YOUR IRELAND TRAVEL PLAN")
+    print("=" * 50 + "\n")
 
-    print("\nGeneral Tips for Your Trip:")
+    print("Trip Summary:")
     print("-" * 20)
-    print(plan['general_tips'])
-    print("\n" + "=" * 50)
+    for piece in drain(summary_pieces, lambda: scheduler.done("summary")):
+        print(piece, end="", flush=True)
+    print()
+
+    print_interests_analysis(scheduler.result("accuracy"))
+    for day in drain(day_plans, lambda: scheduler.done("days")):
+        print_day(day)
+    print_general_tips(scheduler.result("tips"))
 
 def save_plan_to_file(plan, filename="travel_plan.json"):
     directory = "./output"
@@ -199,6 +242,15 @@ def save_plan_to_file(plan, filename="travel_plan.json"):
         json.dump(plan, f, indent=2, ensure_ascii=False)
     print(f"\nPlan saved to {file_path}")
 
+def save_metrics_to_file(metrics_text, file_path=METRICS_EXPORT_PATH):
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(metrics_text)
+    print(f"Metrics saved to {file_path}")
+
 def main():
     try:
         api_key = get_openai_api_key()
@@ -207,36 +259,75 @@ def main():
 
         # text generator
         text_generator = TextGenerator()
-        # Create TravelPlanner
-        planner = TravelPlanner(text_generator)
         # Create POIManager
         poi_manager = POIManager()
+        # Create TravelPlanner
+        planner = TravelPlanner(text_generator, poi_manager=poi_manager)
         # Create ImageGenerator
         image_generator = ImageGenerator(api_key)
 
         # Gather user preferences
         preferences = get_user_input()
 
-        print("\nLoading and filtering points of interest...")
-        poi_dict = poi_manager.load_and_filter_pois(POI_DATA_FILE, preferences)
-
-        print("Generating your travel plan...")
-        plan = planner.generate_travel_plan(poi_dict, preferences)
-
-        print("Generating thumbnail...")
-        image_url = image_generator.generate_trip_image(plan['trip_summary'], preferences.interests)
+        # Stages run as soon as their inputs are ready: tips alongside day organization,
+        # the thumbnail (and its download) alongside the day plans
+        scheduler = StageScheduler()
+        summary_pieces = queue.Queue() if STREAM_OUTPUT else None
+        day_plans = queue.Queue() if STREAM_OUTPUT else None
+        scheduler.add("pois", lambda: poi_manager.load_and_filter_pois(POI_DATA_FILE, preferences))
+        planner.add_plan_stages(
+            scheduler, preferences,
+            on_summary_piece=summary_pieces.put if STREAM_OUTPUT else None,
+            on_day=day_plans.put if STREAM_OUTPUT else None
+        )
+        scheduler.add(
+            "image",
+            lambda trip_summary: image_generator.generate_trip_image(trip_summary, preferences.interests),
+            ["summary"]
+        )
+        scheduler.add(
+            "download",
+            lambda image_url: image_generator.download_image(image_url) if image_url else None,
+            ["image"]
+        )
+
+        print("\nLoading points of interest and generating your travel plan...")
+        with tracing.trace("plan") as run:
+            scheduler.start()
+            if STREAM_OUTPUT:
+                # Sections are printed while the rest of the plan is still being generated
+                display_travel_plan_stages(scheduler, summary_pieces, day_plans)
+            results = scheduler.wait()
+        plan = results["plan"]
+
+        image_url = results["image"]
         if image_url:
             print(f"Generated image URL: {image_url}")
             save_image = input("Do you want to save this image? (y/n): ").lower()
             if save_image == 'y':
                 filename = "travel_poster.png"
-                image_generator.save_image_from_url(image_url, filename)
+                if results["download"] is not None:
+                    image_generator.save_image(results["download"], filename)
+                else:
+                    image_generator.save_image_from_url(image_url, filename)
         else:
             print("Failed to generate trip image.")
 
-        display_travel_plan(plan, image_url)
+        if not STREAM_OUTPUT:
+            display_travel_plan(plan, image_url)
         # display_travel_plan(plan)
+        if TRACE_METRICS:
+            plan["_metrics"] = run.to_dict()
+            save_metrics_to_file(tracing.prometheus_text(run))
         save_plan_to_file(plan)
+        print(scheduler.report())
+
+        cache_stats = text_generator.cache_stats()
+        if cache_stats:
+            print(
+                f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']}% hit rate)"
+            )
 
     except Exception as e:
         print(f"\nError: {str(e)}")
@@ -0,0 +1,101 @@
+import re
+import difflib
+import unicodedata
+from collections import deque
+from typing import Dict, List, Optional
+
+NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# Bullets / numbering in front of a list item, e.g. "- ", "2. ", "* "
+LIST_MARKER = re.compile(r"^\s*(?:[-*•]+|\d+[.)])\s*")
+# Trailing extras after the name, e.g. " (Kerry)", " - short note", ": note"
+LINE_EXTRAS = re.compile(r"\s*(?:\(|\[|\s-\s|:).*$")
+
+FUZZY_CUTOFF = 0.85
+
+def normalize(text: str) -> str:
+    # Lowercase, strip accents and punctuation, single spaces
+    text = unicodedata.normalize('NFKD', text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_ALNUM.sub(" ", text.lower()).strip()
+
+class NameMatcher:
+    """
+    Aho-Corasick automaton over normalized POI names.
+    A line is scanned once; of all names found on word boundaries the
+    longest wins (so "Kilkenny Castle Park" beats "Kilkenny Castle"),
+    preferring names that start in the item over those in trailing notes.
+    Lines without an exact hit fall back to a fuzzy match of the item text.
+    """
+
+    def __init__(self, pois: List[Dict]):
+        self.pois_by_name: Dict[str, Dict] = {}
+        for poi in pois:
+            name = normalize(poi['Name'])
+            if name and name not in self.pois_by_name:
+                self.pois_by_name[name] = poi
+
+        # Trie: goto transitions, failure links and the names ending at each node
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for name in self.pois_by_name:
+            node = 0
+            for char in name:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node].append(name)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def _exact(self, text: str, start_before: Optional[int] = None) -> Optional[str]:
+        # Longest name on word boundaries, optionally only among those starting before start_before
+        best = None
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for name in self._output[node]:
+                start = end - len(name)
+                on_boundary = (start == 0 or text[start - 1] == " ") and (end == len(text) or text[end] == " ")
+                if start_before is not None and start >= start_before:
+                    continue
+                if on_boundary and (best is None or len(name) > len(best)):
+                    best = name
+        return best
+
+    def _fuzzy(self, item: str) -> Optional[str]:
+        if not item:
+            return None
+        close = difflib.get_close_matches(item, list(self.pois_by_name), n=1, cutoff=FUZZY_CUTOFF)
+        return close[0] if close else None
+
+    def match(self, line: str) -> Optional[Dict]:
+        # POI mentioned in a line of LLM output, or None
+        text = LIST_MARKER.sub("", line)
+        item = normalize(LINE_EXTRAS.sub("", text))
+        text = normalize(text)
+        # Names starting in the item come first, so a trailing note naming another POI doesn't
+        # win; starting there, they may run past it ("Piltown - Mountain Grove Loop")
+        name = self._exact(text, len(item)) if item else None
+        if name is None:
+            name = self._exact(text)
+        if name != item:
+            # A misspelt long name can still contain a shorter exact one ("Castle")
+            close = self._fuzzy(item)
+            if close and len(close) > len(name or ""):
+                name = close
+        return self.pois_by_name[name] if name else None
@@ -0,0 +1,126 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
+from config import PIPELINE_MAX_WORKERS
+import tracing
+
+class StageScheduler:
+    """
+    Runs named stages on a thread pool as soon as the stages they depend on
+    have finished. A stage function is called with the results of its
+    dependencies as positional arguments, in the order they were declared.
+    If a stage fails, every stage depending on it fails with the same error.
+    """
+
+    def __init__(self, max_workers: int = PIPELINE_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.stages: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+        self.futures: Dict[str, Future] = {}
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self._pending: List[str] = []
+        self._executor = None
+        self._contexts = {}
+        self._started = None
+        self._finished = None
+        self._lock = threading.Lock()
+
+    def add(self, name: str, fn: Callable, deps: Sequence[str] = ()) -> None:
+        # Dependencies have to be added first, which also rules out cycles
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = (fn, tuple(deps))
+        self.futures[name] = Future()
+        self._pending.append(name)
+
+    def start(self) -> None:
+        # Stages see the context (e.g. the active trace) of the thread that called start()
+        self._contexts = {name: contextvars.copy_context() for name in self.stages}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._started = time.perf_counter()
+        self._submit_ready()
+
+    def wait(self) -> Dict[str, object]:
+        # Blocks until every stage is done; re-raises the first failure in declaration order
+        try:
+            for future in self.futures.values():
+                future.exception()
+        finally:
+            self._executor.shutdown(wait=True)
+            self._finished = time.perf_counter()
+        return {name: future.result() for name, future in self.futures.items()}
+
+    def run(self) -> Dict[str, object]:
+        self.start()
+        return self.wait()
+
+    def result(self, name: str):
+        return self.futures[name].result()
+
+    def done(self, name: str) -> bool:
+        return self.futures[name].done()
+
+    def _submit_ready(self) -> None:
+        with self._lock:
+            ready = []
+            for name in self._pending:
+                deps = self.stages[name][1]
+                if all(self.futures[dep].done() for dep in deps):
+                    ready.append(name)
+            for name in ready:
+                self._pending.remove(name)
+
+        for name in ready:
+            fn, deps = self.stages[name]
+            failed = next((self.futures[dep] for dep in deps if self.futures[dep].exception()), None)
+            if failed is not None:
+                self._finish(name, error=failed.exception(), started=time.perf_counter())
+                continue
+            args = [self.futures[dep].result() for dep in deps]
+            # Each stage runs in its own span of the trace that started the scheduler
+            self._executor.submit(self._contexts[name].run, self._run_stage, name, fn, args)
+
+    def _run_stage(self, name: str, fn: Callable, args: list) -> None:
+        started = time.perf_counter()
+        try:
+            with tracing.span(name):
+                value = fn(*args)
+        except Exception as e:
+            self._finish(name, error=e, started=started)
+        else:
+            self._finish(name, value=value, started=started)
+
+    def _finish(self, name: str, started: float, value=None, error: Exception = None) -> None:
+        self.timings[name] = (started - self._started, time.perf_counter() - self._started)
+        if error is not None:
+            self.futures[name].set_exception(error)
+        else:
+            self.futures[name].set_result(value)
+        self._submit_ready()
+
+    def critical_path(self) -> List[Tuple[str, float]]:
+        # Walks back from the stage that finished last, always through the dependency that
+        # finished last: the chain of stages that determined the total run time
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda stage: self.timings[stage][1])
+        path = []
+        while name is not None:
+            start, end = self.timings[name]
+            path.append((name, end - start))
+            deps = [dep for dep in self.stages[name][1] if dep in self.timings]
+            name = max(deps, key=lambda dep: self.timings[dep][1]) if deps else None
+        return list(reversed(path))
+
+    def report(self) -> str:
+        path = self.critical_path()
+        chain = " -> ".join(f"{name} ({duration:.1f}s)" for name, duration in path)
+        total = (self._finished or time.perf_counter()) - self._started
+        lines = [f"Critical path: {chain}", f"Total: {total:.1f}s"]
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1][0]):
+            lines.append(f"  {name:<12} {start:6.1f}s - {end:6.1f}s")
+        return "\n".join(lines)
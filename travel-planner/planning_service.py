@@ -0,0 +1,214 @@
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from config import (
+    POI_DATA_FILE, LLM_PROVIDER, SERVICE_HOST, SERVICE_PORT,
+    SERVICE_MAX_CONCURRENT_PLANS, SERVICE_MAX_BODY_BYTES
+)
+from poi_manager import POIManager
+from travel_planner import TravelPlanner
+from text_generator import TextGenerator
+from user_preferences import UserPreferences
+import tracing
+
+# Long-running planning service: the POI snapshot and indexes, the LLM backend (model
+# weights for HuggingFace), its cache and the HTTP pools are set up once and shared by
+# all requests, so a request only pays for its own filtering and plan generation.
+#
+#   GET  /health        liveness and loaded POI count
+#   POST /pois/filter   UserPreferences JSON => POIs matching them, grouped by region
+#   POST /plan          UserPreferences JSON => TravelPlanner.generate_travel_plan result
+#   POST /plan/edit     {"plan", "edit", "preferences"} => the plan with one day rebuilt (TravelPlanner.apply_edit)
+#   GET  /stats         request counts/latencies and LLM cache statistics
+#   GET  /metrics       stage, LLM call, token and fallback counters in Prometheus text format
+#
+#   python planning_service.py --port 8080
+
+class PlanningService:
+    def __init__(self, poi_file: str = POI_DATA_FILE, max_concurrent_plans: int = SERVICE_MAX_CONCURRENT_PLANS):
+        self.poi_file = poi_file
+        self.poi_manager = POIManager()
+        self.poi_manager.load_pois(poi_file)
+        self.text_generator = TextGenerator()
+        self.planner = TravelPlanner(self.text_generator, poi_manager=self.poi_manager)
+        self.plan_slots = threading.Semaphore(max(1, max_concurrent_plans))
+        self.started = time.time()
+        # endpoint => {"requests", "errors", "total_seconds"}
+        self.request_stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+        # Guards reloading the snapshot when csvjson.json changes while requests are in flight
+        self._load_lock = threading.Lock()
+
+    def _filtered(self, preferences: UserPreferences) -> Dict:
+        # The POI set is taken under the lock that guards reloads and travels with the result
+        # ("loaded"), so filtering and the planner's nearby queries use the same POIs even
+        # if csvjson.json changes meanwhile
+        with tracing.span("load"):
+            with self._load_lock:
+                self.poi_manager.load_pois(self.poi_file)
+                loaded = self.poi_manager.loaded
+        with tracing.span("filter") as span:
+            filtered_pois = self.poi_manager._filter_pois(preferences, loaded)
+            span.record(pois=len(filtered_pois))
+        return self.poi_manager._organize_pois(filtered_pois, loaded)
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "provider": LLM_PROVIDER,
+            "pois": len(self.poi_manager.pois),
+            "uptime_s": round(time.time() - self.started, 1)
+        }
+
+    def filter_pois(self, body: Dict) -> Dict:
+        poi_dict = self._filtered(UserPreferences.from_dict(body))
+        return {
+            "count": sum(len(region_pois) for region_pois in poi_dict["by_region"].values()),
+            "by_region": poi_dict["by_region"]
+        }
+
+    def plan(self, body: Dict) -> Dict:
+        # Validated before the trace opens, so rejected requests don't count as traced runs
+        preferences = UserPreferences.from_dict(body)
+        # One trace per request, so the plan's "_metrics" also covers loading and filtering
+        with tracing.trace("plan"):
+            poi_dict = self._filtered(preferences)
+            with self.plan_slots:
+                return self.planner.generate_travel_plan(poi_dict, preferences)
+
+    def edit_plan(self, body: Dict) -> Dict:
+        # Replacements come from the same filtered POIs a fresh /plan would use
+        for key in ("plan", "edit", "preferences"):
+            if not isinstance(body.get(key), dict):
+                raise ValueError(f"'{key}' must be a JSON object")
+        preferences = UserPreferences.from_dict(body["preferences"])
+        poi_dict = self._filtered(preferences)
+        with self.plan_slots:
+            return self.planner.apply_edit(body["plan"], body["edit"], preferences, poi_dict)
+
+    def metrics(self) -> str:
+        return tracing.REGISTRY.prometheus()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            endpoints = {
+                path: {
+                    "requests": int(entry["requests"]),
+                    "errors": int(entry["errors"]),
+                    "avg_latency_s": round(entry["total_seconds"] / entry["requests"], 3)
+                }
+                for path, entry in self.request_stats.items()
+            }
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "endpoints": endpoints,
+            "llm_cache": self.text_generator.cache_stats()
+        }
+
+    def record(self, path: str, seconds: float, error: bool) -> None:
+        with self._stats_lock:
+            entry = self.request_stats.setdefault(path, {"requests": 0, "errors": 0, "total_seconds": 0.0})
+            entry["requests"] += 1
+            entry["errors"] += int(error)
+            entry["total_seconds"] += seconds
+
+
+class PlanningRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections for frontends making several calls
+    protocol_version = "HTTP/1.1"
+    service: PlanningService = None
+
+    GET_ROUTES = {"/health": "health", "/stats": "stats", "/metrics": "metrics"}
+    POST_ROUTES = {"/pois/filter": "filter_pois", "/plan": "plan", "/plan/edit": "edit_plan"}
+
+    def do_GET(self):
+        self._dispatch(self.GET_ROUTES, with_body=False)
+
+    def do_POST(self):
+        self._dispatch(self.POST_ROUTES, with_body=True)
+
+    def _dispatch(self, routes: Dict[str, str], with_body: bool) -> None:
+        started = time.perf_counter()
+        path = self.path.split("?", 1)[0].rstrip("/") or "/"
+        status, payload = self._handle(routes, path, with_body)
+        self._send(status, payload)
+        if path in routes:
+            self.service.record(path, time.perf_counter() - started, status >= 400)
+
+    def _handle(self, routes: Dict[str, str], path: str, with_body: bool) -> Tuple[int, object]:
+        method_name = routes.get(path)
+        if method_name is None:
+            return 404, {"error": f"Unknown endpoint: {self.command} {path}"}
+        try:
+            method = getattr(self.service, method_name)
+            if not with_body:
+                return 200, method()
+            body = self._read_json()
+            return 200, method(body)
+        except ValueError as e:
+            # Malformed JSON and invalid preferences
+            return 400, {"error": str(e)}
+        except Exception as e:
+            print(f"[Service Error] {self.command} {path}: {str(e)}")
+            return 500, {"error": str(e)}
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > SERVICE_MAX_BODY_BYTES:
+            # The unread body would otherwise be parsed as the next request on this connection
+            self.close_connection = True
+            raise ValueError(f"Request body larger than {SERVICE_MAX_BODY_BYTES} bytes")
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def _send(self, status: int, payload) -> None:
+        # Plain-text payloads (the Prometheus export) are sent as they are
+        if isinstance(payload, str):
+            data = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        print(f"[Service] {self.address_string()} {format % args}")
+
+
+def create_server(service: PlanningService, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> ThreadingHTTPServer:
+    handler = type("BoundPlanningRequestHandler", (PlanningRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Serve travel plans over HTTP with warm POI and LLM state.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--pois", default=POI_DATA_FILE, help="POI JSON file")
+    parser.add_argument("--max-concurrent-plans", type=int, default=SERVICE_MAX_CONCURRENT_PLANS)
+    args = parser.parse_args(argv)
+
+    print("Loading points of interest and LLM backend...")
+    service = PlanningService(args.pois, args.max_concurrent_plans)
+    server = create_server(service, args.host, args.port)
+    print(f"Planning service listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -86,10 +86,13 @@ class POI:
                     return duration
         return self.visit_duration
 
-    def is_compatible_with_interests(self, interests: List[str]) -> bool:
+    def is_compatible_with_interests(self, interests: List[str], relevance=None) -> bool:
         # Check if the POI matches any of the user's stated interests
+        # (with a RelevanceIndex also by similar tags, e.g. "Castles" => "Castle")
         if not interests:
             return True
+        if relevance is not None:
+            return bool(relevance.matches([{"Tags": ",".join(self.tags)}], interests).any())
         return any(
             interest.lower() in tag.lower()
             for interest in interests
@@ -1,17 +1,42 @@
-from typing import Dict, List
+import re
+import json
+from typing import Dict, List, Optional
 from text_generator import TextGenerator
+from poi_description_store import POIDescriptionStore
+from config import (
+    POI_DESCRIPTION_BATCH_SIZE,
+    POI_DESCRIPTION_BATCH_MAX_CHARS,
+    POI_DESCRIPTION_BATCH_RETRIES
+)
+
+POI_DESCRIPTION_SYSTEM_PROMPT = (
+    "You are a knowledgeable travel guide providing concise, engaging descriptions "
+    "of points of interest in Ireland."
+)
+
+# "key": "value" pairs, used to salvage complete entries from truncated JSON
+JSON_PAIR_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"')
 
 class POIDescriptionGenerator:
-    def __init__(self, text_generator: TextGenerator):
+    def __init__(
+        self,
+        text_generator: TextGenerator,
+        batch_size: int = POI_DESCRIPTION_BATCH_SIZE,
+        store: Optional[POIDescriptionStore] = None
+    ):
         # Generate text for POI descriptions
         self.text_generator = text_generator
+        self.batch_size = max(1, batch_size)
+        # Pre-generated descriptions are served first, the LLM only handles misses
+        self.store = store if store is not None else POIDescriptionStore()
 
     def generate_poi_description(self, poi: Dict) -> str:
+        stored = self.store.get(poi)
+        if stored is not None:
+            return stored
+
         # Prompts for description of a specific POI
-        system_prompt = (
-            "You are a knowledgeable travel guide providing concise, engaging descriptions "
-            "of points of interest in Ireland."
-        )
+        system_prompt = POI_DESCRIPTION_SYSTEM_PROMPT
         user_prompt = f"""
         Create a brief, engaging description for this point of interest:
         Name: {poi.get('Name', '')}
@@ -27,6 +52,114 @@ class POIDescriptionGenerator:
             print(f"Error generating description for {poi['Name']}: {str(e)}")
             return f"Description unavailable for {poi['Name']}"
 
+    def generate_poi_descriptions(self, pois: List[Dict]) -> Dict[str, str]:
+        # Describe several POIs per request, returns descriptions keyed by POI name
+        descriptions = {}
+        pending = []
+        for poi in {poi['Name']: poi for poi in pois}.values():
+            stored = self.store.get(poi)
+            if stored is not None:
+                descriptions[poi['Name']] = stored
+            else:
+                pending.append(poi)
+
+        if self.batch_size > 1:
+            for _ in range(1 + POI_DESCRIPTION_BATCH_RETRIES):
+                if not pending:
+                    break
+                for batch in self._split_batches(pending):
+                    descriptions.update(self._describe_batch(batch))
+                # Only entries missing from a partial answer are asked again
+                pending = [poi for poi in pending if poi['Name'] not in descriptions]
+
+        for poi in pending:
+            descriptions[poi['Name']] = self.generate_poi_description(poi)
+        return descriptions
+
+    def _split_batches(self, pois: List[Dict]) -> List[List[Dict]]:
+        # Split by POI count and by prompt size
+        batches = []
+        current = []
+        current_chars = 0
+        for poi in pois:
+            entry_chars = len(self._batch_entry(poi))
+            if current and (
+                len(current) >= self.batch_size
+                or current_chars + entry_chars > POI_DESCRIPTION_BATCH_MAX_CHARS
+            ):
+                batches.append(current)
+                current = []
+                current_chars = 0
+            current.append(poi)
+            current_chars += entry_chars
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def _batch_entry(poi: Dict) -> str:
+        return (
+            f"- Name: {poi.get('Name', '')}\n"
+            f"  Location: {poi.get('AddressLocality', '')}, {poi.get('AddressRegion', '')}, Ireland\n"
+            f"  Categories: {poi.get('Tags', '')}"
+        )
+
+    def _describe_batch(self, pois: List[Dict]) -> Dict[str, str]:
+        # One structured request for the whole batch
+        if len(pois) == 1:
+            return {pois[0]['Name']: self.generate_poi_description(pois[0])}
+
+        entries = "\n".join(self._batch_entry(poi) for poi in pois)
+        user_prompt = f"""
+        Create a brief, engaging description for each of these points of interest:
+        {entries}
+        Include a practical tip for visitors in every description.
+        Keep each description concise but informative (about 80 words).
+
+        Respond ONLY with a JSON object mapping each name exactly as provided to its description, e.g.
+        {{"<name>": "<description>"}}
+        """
+
+        try:
+            response = self.text_generator.generate_chat_completion(POI_DESCRIPTION_SYSTEM_PROMPT, user_prompt)
+        except Exception as e:
+            print(f"Error generating batch descriptions: {str(e)}")
+            return {}
+        if response.startswith("Error"):
+            return {}
+
+        names = {poi['Name'].lower(): poi['Name'] for poi in pois}
+        descriptions = {}
+        for name, description in self._parse_batch_response(response).items():
+            poi_name = names.get(name.strip().lower())
+            if poi_name and description.strip():
+                descriptions[poi_name] = description.strip()
+        if not descriptions:
+            # Otherwise the retry round (and later runs) would get this answer back from the LLM cache
+            self.text_generator.invalidate(POI_DESCRIPTION_SYSTEM_PROMPT, user_prompt)
+        return descriptions
+
+    @staticmethod
+    def _parse_batch_response(response: str) -> Dict[str, str]:
+        # Whole JSON object first, then any complete pairs from a truncated answer
+        start = response.find('{')
+        end = response.rfind('}')
+        if start != -1 and end > start:
+            try:
+                data = json.loads(response[start:end + 1])
+                if isinstance(data, dict):
+                    return {str(k): v for k, v in data.items() if isinstance(v, str)}
+            except ValueError:
+                pass
+
+        pairs = {}
+        for match in JSON_PAIR_PATTERN.finditer(response):
+            try:
+                pairs[json.loads(f'"{match.group(1)}"')] = json.loads(f'"{match.group(2)}"')
+            except ValueError:
+                continue
+        return pairs
+
     def generate_day_summary(self, pois: List[Dict]) -> str:
         # Summarize a day
         system_prompt = (
@@ -50,7 +183,7 @@ class POIDescriptionGenerator:
             "You are a knowledgeable travel advisor providing practical tips for traveling in Ireland."
         )
         poi_count = len(pois)
-        regions = list(set(poi['AddressRegion'] for poi in pois))
+        regions = list(dict.fromkeys(poi['AddressRegion'] for poi in pois))
 
         user_prompt = f"""
         Create travel tips for an itinerary with these details:
@@ -0,0 +1,66 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Optional
+from config import POI_DESCRIPTION_STORE_PATH, POI_DESCRIPTION_STORE_VERSION
+
+class POIDescriptionStore:
+    """
+    Append-only JSONL store of pre-generated POI descriptions.
+    Entries are keyed by a content hash of the raw POI record, so an edited
+    record is simply a miss; entries written under another version are ignored.
+    """
+
+    def __init__(self, path: str = POI_DESCRIPTION_STORE_PATH, version: int = POI_DESCRIPTION_STORE_VERSION):
+        self.path = path
+        self.version = version
+        self._descriptions = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def record_key(poi: Dict) -> str:
+        # Hash of the canonical JSON form of the record
+        payload = json.dumps(poi, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A job interrupted mid-write can leave a partial last line
+                    continue
+                if entry.get("version") == self.version:
+                    self._descriptions[entry["key"]] = entry["description"]
+
+    def get(self, poi: Dict) -> Optional[str]:
+        return self._descriptions.get(self.record_key(poi))
+
+    def __contains__(self, poi: Dict) -> bool:
+        return self.record_key(poi) in self._descriptions
+
+    def __len__(self) -> int:
+        return len(self._descriptions)
+
+    def put(self, poi: Dict, description: str, model: str = "") -> None:
+        # Appended and flushed right away, so an interrupted job can resume
+        key = self.record_key(poi)
+        entry = {
+            "key": key,
+            "version": self.version,
+            "name": poi.get('Name', ''),
+            "model": model,
+            "description": description
+        }
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._descriptions[key] = description
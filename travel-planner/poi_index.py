@@ -0,0 +1,120 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+import numpy as np
+from poi_snapshot import POISnapshot
+from relevance_index import RelevanceIndex
+
+class POIIndex:
+    """
+    Inverted index over the raw POI records, built once per load.
+    Regions map to POI ids by exact value; tags map to POI ids by their
+    lowercased comma-separated tokens. A search term is scored against the
+    (small) tag vocabulary by the RelevanceIndex - tags or words in tags
+    containing the term, as in the old `term.lower() in poi['Tags'].lower()`
+    check, plus similar ones - and the POIs follow from one product with the
+    POI x tag matrix.
+    """
+
+    def __init__(self, pois: Sequence[Dict], build: bool = True, relevance: Optional[RelevanceIndex] = None):
+        self.pois = pois
+        self.all_ids = set(range(len(pois)))
+        self.by_region: Dict[str, Set[int]] = {}
+        self.by_tag: Dict[str, Set[int]] = {}
+        self.relevance = relevance if relevance is not None else RelevanceIndex()
+        # Sparse POI x tag incidence; column j is tag_columns[j] (None without tags)
+        self.tag_columns: List[str] = []
+        self.tag_incidence = None
+        self._tags_text: Optional[List[str]] = None
+        self._tag_column_records: Optional[List[Dict]] = None
+        self._term_cache: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+
+        if not build:
+            return
+        for poi_id, poi in enumerate(pois):
+            self.by_region.setdefault(poi.get('AddressRegion'), set()).add(poi_id)
+            for tag in poi.get('Tags', '').lower().split(','):
+                self.by_tag.setdefault(tag, set()).add(poi_id)
+        if not self.by_tag:
+            return
+        # Imported on first use, keeping scipy out of startup
+        from scipy import sparse
+        self.tag_columns = list(self.by_tag)
+        rows = [poi_id for tag in self.tag_columns for poi_id in self.by_tag[tag]]
+        columns = [column for column, tag in enumerate(self.tag_columns) for _ in self.by_tag[tag]]
+        self.tag_incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)), shape=(len(pois), len(self.tag_columns))
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: POISnapshot, relevance: Optional[RelevanceIndex] = None) -> 'POIIndex':
+        # Built from the region codes and tag bitsets, without materialising records
+        index = cls(snapshot, build=False, relevance=relevance)
+
+        if 'AddressRegion' in snapshot.columns and snapshot.kinds['AddressRegion'] == "str":
+            codes = np.asarray(snapshot.columns['AddressRegion'])
+            order = np.argsort(codes, kind='stable')
+            unique_codes, starts = np.unique(codes[order], return_index=True)
+            for code, ids in zip(unique_codes, np.split(order, starts[1:])):
+                index.by_region.setdefault(snapshot.string(int(code)), set()).update(ids.tolist())
+        else:
+            for poi_id, poi in enumerate(snapshot):
+                index.by_region.setdefault(poi.get('AddressRegion'), set()).add(poi_id)
+
+        if snapshot.tags:
+            from scipy import sparse
+            tag_matrix = snapshot.tag_matrix()
+            for tag_id, tag in enumerate(snapshot.tags):
+                ids = np.flatnonzero(tag_matrix[:, tag_id]).tolist()
+                index.by_tag.setdefault(tag.lower(), set()).update(ids)
+            index.tag_columns = list(snapshot.tags)
+            index.tag_incidence = sparse.csr_matrix(tag_matrix[:, :len(snapshot.tags)], dtype=np.float32)
+        return index
+
+    def region_ids(self, regions: Iterable[str]) -> Set[int]:
+        ids = set()
+        for region in regions:
+            ids |= self.by_region.get(region, set())
+        return ids
+
+    def term_ids(self, term: str) -> Set[int]:
+        # POIs with a tag containing the term (case-insensitive substring) or similar to it
+        term = term.lower()
+        with self._lock:
+            cached = self._term_cache.get(term)
+        if cached is not None:
+            return cached
+
+        if ',' in term:
+            # Spans several tags, only a scan of the full tag strings is equivalent
+            if self._tags_text is None:
+                self._tags_text = [poi.get('Tags', '').lower() for poi in self.pois]
+            ids = {poi_id for poi_id, text in enumerate(self._tags_text) if term in text}
+        elif self.tag_incidence is None:
+            ids = set()
+        else:
+            # Each tag scored as a Tags text of its own, with the words in it, exactly as
+            # RelevanceIndex.matches scores the POIs carrying it
+            relevance = self.relevance.interest_scores(self._tag_records(), [term])[:, 0]
+            ids = set(np.flatnonzero(self.tag_incidence @ relevance).tolist())
+
+        with self._lock:
+            self._term_cache[term] = ids
+        return ids
+
+    def _tag_records(self) -> List[Dict]:
+        with self._lock:
+            if self._tag_column_records is None:
+                self._tag_column_records = [{'Tags': tag} for tag in self.tag_columns]
+            return self._tag_column_records
+
+    def any_term_ids(self, terms: Iterable[str]) -> Set[int]:
+        # Union over the terms, like any(...) in the old filters
+        ids = set()
+        for term in terms:
+            ids |= self.term_ids(term)
+        return ids
+
+    def select(self, ids: Iterable[int]) -> List[Dict]:
+        # Records in their original file order
+        return [self.pois[poi_id] for poi_id in sorted(ids)]
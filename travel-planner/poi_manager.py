@@ -1,58 +1,116 @@
-import json
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
 from user_preferences import UserPreferences
+from poi_index import POIIndex
+from relevance_index import RelevanceIndex
+from poi_snapshot import load_snapshot, snapshot_dir_for, is_stale
+from spatial_index import GeoGridIndex
+from config import DISTANCE_MATRIX_CACHE_SIZE, NEARBY_RADIUS_KM, NEARBY_LIMIT
+import geo
 import math
+import tracing
+
+class LoadedPOIs:
+    # One loaded POI set and everything built from it. A reload replaces it as a whole, so a
+    # request holding on to it keeps filtering and querying the same POI ids meanwhile
+    def __init__(self, pois, snapshot=None, relevance: Optional[RelevanceIndex] = None):
+        self.pois = pois
+        self.snapshot = snapshot
+        # Interest relevance over the tags of the loaded POIs (shared with TravelPlanner)
+        self.relevance = relevance if relevance is not None else RelevanceIndex()
+        # Tag/region lookup built at load time
+        if snapshot is not None:
+            self.index = POIIndex.from_snapshot(snapshot, self.relevance)
+            # Grid over POI coordinates for radius / nearest queries
+            self.spatial_index = GeoGridIndex(snapshot.latitudes, snapshot.longitudes)
+        else:
+            self.index = POIIndex(pois, relevance=self.relevance)
+            self.spatial_index = GeoGridIndex(np.zeros(0), np.zeros(0))
+        self.tag_masks = {}
+        # Name => POI id, built on first lookup
+        self.name_ids = None
 
 class POIManager:
     def __init__(self):
-        # List of all POIs from the JSON
-        self.pois = []
+        # All POIs from the JSON, served from a memory-mapped snapshot once loaded
+        self.loaded = LoadedPOIs([])
+        self.source_path = None
+        # Pairwise distance matrices keyed by POI set and dtype (LRU)
+        self._distance_matrices = OrderedDict()
+        self._distance_lock = threading.Lock()
 
-    def load_and_filter_pois(self, file_path: str, preferences: UserPreferences) -> Dict:
-        # Loads POI JSON file and filter by user preferences
+    # The current POI set; callers that must not see a reload take self.loaded once and pass it on
+    @property
+    def pois(self):
+        return self.loaded.pois
+
+    @property
+    def snapshot(self):
+        return self.loaded.snapshot
+
+    @property
+    def relevance(self) -> RelevanceIndex:
+        return self.loaded.relevance
+
+    @property
+    def index(self) -> POIIndex:
+        return self.loaded.index
+
+    @property
+    def spatial_index(self) -> GeoGridIndex:
+        return self.loaded.spatial_index
+
+    def load_pois(self, file_path: str) -> None:
+        # Opens the snapshot of the POI file, reusing the current one while the source is unchanged
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.pois = json.load(f)
+            if (
+                self.snapshot is not None
+                and self.source_path == file_path
+                and not is_stale(file_path, snapshot_dir_for(file_path))
+            ):
+                return
+            snapshot = load_snapshot(file_path)
         except Exception as e:
             raise Exception(f"Error loading POI data: {str(e)}")
+        self.loaded = LoadedPOIs(snapshot, snapshot, RelevanceIndex(snapshot.tags))
+        self.source_path = file_path
 
-        filtered_pois = self._filter_pois(preferences)
-        return self._organize_pois(filtered_pois)
+    def load_and_filter_pois(self, file_path: str, preferences: UserPreferences) -> Dict:
+        # Loads POI JSON file and filter by user preferences
+        with tracing.span("load"):
+            self.load_pois(file_path)
+            loaded = self.loaded
 
-    def _filter_pois(self, preferences: UserPreferences) -> List[Dict]:
-        # Filter POIs by region, interest, or special requirements
-        filtered = self.pois.copy()
+        with tracing.span("filter") as span:
+            filtered_pois = self._filter_pois(preferences, loaded)
+            span.record(pois=len(filtered_pois))
+        return self._organize_pois(filtered_pois, loaded)
 
+    def _filter_pois(self, preferences: UserPreferences, loaded: Optional[LoadedPOIs] = None) -> List[Dict]:
+        # Filter POIs by region, interest, or special requirements; loaded pins the
+        # POI set when another thread may reload it meanwhile
+        index = (loaded or self.loaded).index
         if preferences.regions:
-            filtered = [
-                poi for poi in filtered
-                if poi['AddressRegion'] in preferences.regions
-            ]
-
-        filtered = [
-            poi for poi in filtered
-            if any(
-                interest.lower() in poi['Tags'].lower()
-                for interest in preferences.interests
-            )
-        ]
+            ids = index.region_ids(preferences.regions)
+        else:
+            ids = index.all_ids
+
+        ids = ids & index.any_term_ids(preferences.interests)
 
         if preferences.special_requirements:
-            filtered = [
-                poi for poi in filtered
-                if any(
-                    req.lower() in poi['Tags'].lower()
-                    for req in preferences.special_requirements
-                )
-            ]
-        return filtered
-
-    def _organize_pois(self, filtered_pois: List[Dict]) -> Dict:
-        # Group filtered POIs by region and category
+            ids = ids & index.any_term_ids(preferences.special_requirements)
+        return index.select(ids)
+
+    def _organize_pois(self, filtered_pois: List[Dict], loaded: Optional[LoadedPOIs] = None) -> Dict:
+        # Group filtered POIs by region and category. "loaded" is the POI set they were
+        # filtered from, for the nearby queries made while planning them
         organized = {
             "total_count": len(filtered_pois),
             "by_region": {},
-            "by_category": {}
+            "by_category": {},
+            "loaded": loaded or self.loaded
         }
 
         for poi in filtered_pois:
@@ -77,6 +135,24 @@ class POIManager:
         }
         return organized
 
+    def poi_by_name(self, name: str, loaded: Optional[LoadedPOIs] = None) -> Optional[Dict]:
+        # Loaded POI with this name (the first one in file order), None if there is none
+        loaded = loaded or self.loaded
+        if loaded.name_ids is None:
+            name_ids = {}
+            snapshot = loaded.snapshot
+            if snapshot is not None and snapshot.kinds.get('Name') == "str":
+                # From the name codes, without materialising the records
+                for poi_id, code in enumerate(np.asarray(snapshot.columns['Name']).tolist()):
+                    if code >= 0:
+                        name_ids.setdefault(snapshot.string(code), poi_id)
+            else:
+                for poi_id, poi in enumerate(loaded.pois):
+                    name_ids.setdefault(poi.get('Name'), poi_id)
+            loaded.name_ids = name_ids
+        poi_id = loaded.name_ids.get(name)
+        return loaded.pois[poi_id] if poi_id is not None else None
+
     @staticmethod
     def calculate_distance(poi1: Dict, poi2: Dict) -> float:
         # Distance between two POIs (haversine)
@@ -91,4 +167,112 @@ class POIManager:
         dlon = lon2 - lon1
         a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
         c = 2 * math.asin(math.sqrt(a))
-        return R * c
\ No newline at end of file
+        return R * c
+
+    @staticmethod
+    def coordinates(pois: List[Dict], dtype=np.float64) -> Tuple[np.ndarray, np.ndarray]:
+        # Latitude and longitude arrays for a list of POIs
+        lats = np.fromiter((float(poi['Latitude']) for poi in pois), dtype=dtype, count=len(pois))
+        lons = np.fromiter((float(poi['Longitude']) for poi in pois), dtype=dtype, count=len(pois))
+        return lats, lons
+
+    def distance_matrix(self, pois: List[Dict], dtype=np.float64) -> np.ndarray:
+        # Pairwise haversine distances (km) between the POIs, cached per POI set.
+        # The returned matrix is shared and read-only
+        dtype = np.dtype(dtype)
+        key = (dtype.str, tuple((poi['Name'], poi['Latitude'], poi['Longitude']) for poi in pois))
+        with self._distance_lock:
+            matrix = self._distance_matrices.get(key)
+            if matrix is not None:
+                self._distance_matrices.move_to_end(key)
+                return matrix
+
+        lats, lons = self.coordinates(pois, dtype)
+        matrix = geo.distance_matrix(lats, lons, dtype)
+        matrix.setflags(write=False)
+
+        with self._distance_lock:
+            self._distance_matrices[key] = matrix
+            while len(self._distance_matrices) > DISTANCE_MATRIX_CACHE_SIZE:
+                self._distance_matrices.popitem(last=False)
+        return matrix
+
+    def distances_from(self, poi: Dict, pois: List[Dict], dtype=np.float64) -> np.ndarray:
+        # Distances (km) from one POI to each POI of the list
+        lats, lons = self.coordinates(pois, dtype)
+        return geo.distances_from(float(poi['Latitude']), float(poi['Longitude']), lats, lons, dtype)
+
+    @staticmethod
+    def _tag_mask(loaded: LoadedPOIs, tags: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        # Boolean mask of the POIs matching any of the tags, None means no tag filter
+        if not tags:
+            return None
+        key = tuple(sorted(tag.lower() for tag in tags))
+        mask = loaded.tag_masks.get(key)
+        if mask is None:
+            mask = np.zeros(len(loaded.pois), dtype=bool)
+            mask[list(loaded.index.any_term_ids(key))] = True
+            if len(loaded.tag_masks) >= 64:
+                loaded.tag_masks.clear()
+            loaded.tag_masks[key] = mask
+        return mask
+
+    def pois_within(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        tags: Optional[List[str]] = None,
+        loaded: Optional[LoadedPOIs] = None
+    ) -> List[Tuple[Dict, float]]:
+        # Loaded POIs within radius_km of a point (optionally matching any tag), nearest first
+        loaded = loaded or self.loaded
+        found = loaded.spatial_index.radius(latitude, longitude, radius_km, self._tag_mask(loaded, tags))
+        return [(loaded.pois[poi_id], distance) for poi_id, distance in found]
+
+    def nearest_pois(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        tags: Optional[List[str]] = None,
+        max_radius_km: Optional[float] = None,
+        loaded: Optional[LoadedPOIs] = None
+    ) -> List[Tuple[Dict, float]]:
+        # k loaded POIs closest to a point (optionally matching any tag)
+        loaded = loaded or self.loaded
+        kwargs = {"max_radius_km": max_radius_km} if max_radius_km is not None else {}
+        found = loaded.spatial_index.nearest(latitude, longitude, k, self._tag_mask(loaded, tags), **kwargs)
+        return [(loaded.pois[poi_id], distance) for poi_id, distance in found]
+
+    def nearby_suggestions(
+        self,
+        poi: Dict,
+        exclude_names: Iterable[str] = (),
+        tags: Optional[List[str]] = None,
+        radius_km: float = NEARBY_RADIUS_KM,
+        limit: int = NEARBY_LIMIT,
+        loaded: Optional[LoadedPOIs] = None
+    ) -> List[Dict]:
+        # "Also nearby" entries for an activity, skipping the POI itself and excluded names
+        exclude_names = set(exclude_names) | {poi['Name']}
+        found = self.nearest_pois(
+            float(poi['Latitude']),
+            float(poi['Longitude']),
+            limit + len(exclude_names),
+            tags,
+            max_radius_km=radius_km,
+            loaded=loaded
+        )
+        suggestions = []
+        for nearby_poi, distance in found:
+            if nearby_poi['Name'] in exclude_names:
+                continue
+            suggestions.append({
+                "name": nearby_poi['Name'],
+                "location": f"{nearby_poi.get('AddressLocality', '')}, {nearby_poi.get('AddressRegion', '')}",
+                "distance_km": round(distance, 1)
+            })
+            if len(suggestions) >= limit:
+                break
+        return suggestions
@@ -0,0 +1,311 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import numpy as np
+from config import POI_SNAPSHOT_DIR
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+# Name of the published version, inside the snapshot directory of a source file
+CURRENT_FILE = "current"
+LOCK_FILE = ".lock"
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+class POISnapshot:
+    """
+    Read-only columnar view of a POI file, opened with memory-mapped arrays.
+    Layout of a snapshot version (a v-* directory named by the "current" file
+    of the source's snapshot directory, replaced as a whole on rebuild):
+      manifest.json       - field order, column kinds, tag vocabulary, source stamp
+      coords.npy          - float64 (n, 2) latitude/longitude
+      column_<i>.npy      - per field: float64 values or int32 codes into the string table (-1 = missing)
+      strings.bin/.npy    - interned UTF-8 string table and its offsets
+      tag_bits.npy        - uint8 (n, ceil(tags / 8)) packed tag bitsets
+    Records are materialised as the original dicts only when accessed.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.fields: List[str] = self.manifest["fields"]
+        self.kinds: Dict[str, str] = self.manifest["kinds"]
+        self.tags: List[str] = self.manifest["tags"]
+
+        self.coords = self._load_array("coords.npy")
+        self.tag_bits = self._load_array("tag_bits.npy")
+        self.columns = {
+            field: self._load_array(f"column_{column_id}.npy")
+            for column_id, field in enumerate(self.fields)
+        }
+        self._string_offsets = self._load_array("string_offsets.npy")
+        self._string_blob = np.memmap(os.path.join(directory, "strings.bin"), dtype=np.uint8, mode='r') \
+            if int(self._string_offsets[-1]) > 0 else np.zeros(0, dtype=np.uint8)
+        self._strings: List[Optional[str]] = [None] * (len(self._string_offsets) - 1)
+        self._records: Dict[int, Dict] = {}
+
+    def _load_array(self, filename: str) -> np.ndarray:
+        return np.load(os.path.join(self.directory, filename), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return self.manifest["count"]
+
+    def __getitem__(self, poi_id: int) -> Dict:
+        if poi_id < 0:
+            poi_id += len(self)
+        if not 0 <= poi_id < len(self):
+            raise IndexError(poi_id)
+        record = self._records.get(poi_id)
+        if record is None:
+            record = self._build_record(poi_id)
+            self._records[poi_id] = record
+        return record
+
+    def __iter__(self):
+        for poi_id in range(len(self)):
+            yield self[poi_id]
+
+    @property
+    def latitudes(self) -> np.ndarray:
+        return self.coords[:, 0]
+
+    @property
+    def longitudes(self) -> np.ndarray:
+        return self.coords[:, 1]
+
+    def string(self, code: int) -> Optional[str]:
+        # Interned lookup, each table entry is decoded at most once
+        if code < 0:
+            return None
+        value = self._strings[code]
+        if value is None:
+            start, end = int(self._string_offsets[code]), int(self._string_offsets[code + 1])
+            value = bytes(self._string_blob[start:end]).decode('utf-8')
+            self._strings[code] = value
+        return value
+
+    def value(self, field: str, poi_id: int):
+        kind = self.kinds[field]
+        if kind == "float":
+            return float(self.columns[field][poi_id])
+        text = self.string(int(self.columns[field][poi_id]))
+        if kind == "str":
+            return text
+        return json.loads(text)
+
+    def has_value(self, field: str, poi_id: int) -> bool:
+        return self.kinds[field] == "float" or int(self.columns[field][poi_id]) >= 0
+
+    def _build_record(self, poi_id: int) -> Dict:
+        return {
+            field: self.value(field, poi_id)
+            for field in self.fields
+            if self.has_value(field, poi_id)
+        }
+
+    def tag_matrix(self) -> np.ndarray:
+        # Unpacked (n, tags) boolean matrix
+        return np.unpackbits(self.tag_bits, axis=1, count=len(self.tags)).astype(bool)
+
+def snapshot_dir_for(source_path: str, base_dir: str = POI_SNAPSHOT_DIR) -> str:
+    # One snapshot per source file
+    source_path = os.path.abspath(source_path)
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    digest = hashlib.sha1(source_path.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(base_dir, f"{name}-{digest}")
+
+def _source_stamp(source_path: str) -> Dict:
+    stat = os.stat(source_path)
+    return {"source_mtime": stat.st_mtime, "source_size": stat.st_size}
+
+def current_version(directory: str) -> Optional[str]:
+    # The published snapshot version of a snapshot directory, None before the first build
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(directory, name) if name else None
+
+def is_stale(source_path: str, directory: str) -> bool:
+    version = current_version(directory)
+    if version is None:
+        return True
+    manifest_path = os.path.join(version, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return True
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except ValueError:
+        return True
+    stamp = _source_stamp(source_path)
+    return (
+        manifest.get("format") != SNAPSHOT_FORMAT
+        or stamp["source_mtime"] > manifest.get("source_mtime", 0)
+        or stamp["source_size"] != manifest.get("source_size")
+    )
+
+@contextmanager
+def _build_lock(directory: str):
+    # One builder per snapshot directory across processes; released by the OS if the builder dies
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after about 10 seconds
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def build_snapshot(source_path: str, directory: str) -> None:
+    # Compile the JSON file into a new version of the snapshot directory
+    with _build_lock(directory):
+        _write_snapshot(source_path, directory)
+
+def _write_snapshot(source_path: str, directory: str) -> None:
+    # Written to a version directory of its own and published by atomically replacing the
+    # "current" pointer, so readers always find a complete snapshot. Callers hold the build lock
+    with open(source_path, 'r', encoding='utf-8') as f:
+        pois = json.load(f)
+    stamp = _source_stamp(source_path)
+
+    fields = []
+    for poi in pois:
+        for field in poi:
+            if field not in fields:
+                fields.append(field)
+
+    kinds = {}
+    for field in fields:
+        if all(type(poi.get(field)) is float for poi in pois):
+            kinds[field] = "float"
+        elif all(isinstance(poi[field], str) for poi in pois if field in poi):
+            kinds[field] = "str"
+        else:
+            # Mixed types (e.g. Telephone as int or str) keep their JSON form
+            kinds[field] = "json"
+
+    strings = {}
+    columns = {}
+    for field in fields:
+        if kinds[field] == "float":
+            columns[field] = np.array([poi[field] for poi in pois], dtype=np.float64)
+            continue
+        codes = np.full(len(pois), -1, dtype=np.int32)
+        for poi_id, poi in enumerate(pois):
+            if field not in poi:
+                continue
+            value = poi[field]
+            text = value if kinds[field] == "str" else json.dumps(value, ensure_ascii=False)
+            codes[poi_id] = strings.setdefault(text, len(strings))
+        columns[field] = codes
+
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(data) for data in encoded])
+
+    coords = np.zeros((len(pois), 2), dtype=np.float64)
+    for poi_id, poi in enumerate(pois):
+        coords[poi_id] = (float(poi.get('Latitude') or 0), float(poi.get('Longitude') or 0))
+
+    tags = {}
+    poi_tag_ids = []
+    for poi in pois:
+        poi_tag_ids.append([tags.setdefault(tag, len(tags)) for tag in poi.get('Tags', '').split(',')])
+    tag_matrix = np.zeros((len(pois), max(len(tags), 1)), dtype=bool)
+    for poi_id, tag_ids in enumerate(poi_tag_ids):
+        tag_matrix[poi_id, tag_ids] = True
+
+    tmp_directory = tempfile.mkdtemp(prefix="v-", dir=directory)
+
+    np.save(os.path.join(tmp_directory, "coords.npy"), coords)
+    np.save(os.path.join(tmp_directory, "tag_bits.npy"), np.packbits(tag_matrix, axis=1))
+    for column_id, field in enumerate(fields):
+        np.save(os.path.join(tmp_directory, f"column_{column_id}.npy"), columns[field])
+    np.save(os.path.join(tmp_directory, "string_offsets.npy"), offsets)
+    with open(os.path.join(tmp_directory, "strings.bin"), 'wb') as f:
+        f.write(b"".join(encoded))
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "source": os.path.abspath(source_path),
+        "count": len(pois),
+        "fields": fields,
+        "kinds": kinds,
+        "tags": list(tags),
+        **stamp
+    }
+    with open(os.path.join(tmp_directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    fd, pointer_path = tempfile.mkstemp(prefix=".current-", dir=directory)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(tmp_directory))
+    os.replace(pointer_path, os.path.join(directory, CURRENT_FILE))
+
+    # Older versions (and the files of the pre-versioned layout). Open snapshots keep their
+    # memory maps on POSIX; where removal fails (mapped files on Windows) the next build retries
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if entry in (CURRENT_FILE, LOCK_FILE) or path == tmp_directory:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def load_snapshot(source_path: str, directory: Optional[str] = None) -> POISnapshot:
+    # Open the snapshot of a POI file, compiling it first if missing or out of date
+    directory = directory or snapshot_dir_for(source_path)
+    for attempt in range(2):
+        if is_stale(source_path, directory):
+            with _build_lock(directory):
+                # Another process may have built it while this one waited for the lock
+                if is_stale(source_path, directory):
+                    _write_snapshot(source_path, directory)
+        try:
+            return POISnapshot(current_version(directory))
+        except FileNotFoundError:
+            # A newer version was published and the one just read removed; follow the pointer again
+            if attempt:
+                raise
+
+if __name__ == "__main__":
+    import argparse
+    from config import POI_DATA_FILE
+
+    parser = argparse.ArgumentParser(description="Compile a POI JSON file into a columnar snapshot.")
+    parser.add_argument("source", nargs="?", default=POI_DATA_FILE, help="POI JSON file")
+    parser.add_argument("--output", default=None, help="snapshot directory")
+    args = parser.parse_args()
+
+    output = args.output or snapshot_dir_for(args.source)
+    build_snapshot(args.source, output)
+    print(f"Snapshot of {args.source} written to {output}")
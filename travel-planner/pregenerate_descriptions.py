@@ -0,0 +1,108 @@
+import json
+import time
+import argparse
+import threading
+from typing import Dict, List
+from config import POI_DATA_FILE, POI_DESCRIPTION_BATCH_SIZE, POI_DESCRIPTION_STORE_PATH
+from poi_description_store import POIDescriptionStore
+from poi_description_generator import POIDescriptionGenerator
+from text_generator import TextGenerator
+
+class PacedTextGenerator:
+    # Wraps a TextGenerator so consecutive requests stay under a requests/minute budget
+    def __init__(self, text_generator: TextGenerator, requests_per_minute: float):
+        self.text_generator = text_generator
+        self.model_name = getattr(text_generator, "model_name", "")
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.backoff_seconds = 0.0
+        self._next_request = 0.0
+        self._lock = threading.Lock()
+
+    def generate_chat_completion(self, system_prompt: str, user_prompt: str) -> str:
+        with self._lock:
+            wait = self._next_request - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._next_request = time.monotonic() + self.interval + self.backoff_seconds
+
+        text = self.text_generator.generate_chat_completion(system_prompt, user_prompt)
+        # Provider errors slow the job down instead of burning through the quota
+        if text.startswith("Error"):
+            self.backoff_seconds = min(max(self.backoff_seconds * 2, 2.0), 120.0)
+        else:
+            self.backoff_seconds = 0.0
+        return text
+
+    def invalidate(self, system_prompt: str, user_prompt: str) -> None:
+        # Unparseable batch answers are dropped from the wrapped generator's cache
+        self.text_generator.invalidate(system_prompt, user_prompt)
+
+def pregenerate(
+    pois: List[Dict],
+    store: POIDescriptionStore,
+    generator: POIDescriptionGenerator,
+    batch_size: int,
+    max_failed_batches: int = 5
+) -> int:
+    # Describes every POI not yet in the store, returns the number of new entries
+    pending = {}
+    for poi in pois:
+        if poi not in store:
+            pending.setdefault(store.record_key(poi), poi)
+    pending = list(pending.values())
+    print(f"{len(store)} descriptions already stored, {len(pending)} to generate")
+
+    model = generator.text_generator.model_name
+    generated = 0
+    failed_batches = 0
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        descriptions = generator.generate_poi_descriptions(batch)
+
+        stored_in_batch = 0
+        for poi in batch:
+            description = descriptions.get(poi['Name'], "")
+            # Failures are left out so the next run picks them up again
+            if not description or description.startswith(("Error", "Description unavailable")):
+                continue
+            store.put(poi, description, model)
+            stored_in_batch += 1
+        generated += stored_in_batch
+
+        failed_batches = failed_batches + 1 if stored_in_batch == 0 else 0
+        print(f"[{min(start + batch_size, len(pending))}/{len(pending)}] stored {stored_in_batch}/{len(batch)}")
+        if failed_batches >= max_failed_batches:
+            print(f"Stopping after {failed_batches} failed batches in a row, rerun to resume.")
+            break
+
+    return generated
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate POI descriptions into the description store.")
+    parser.add_argument("--input", default=POI_DATA_FILE, help="POI JSON file")
+    parser.add_argument("--store", default=POI_DESCRIPTION_STORE_PATH, help="description store (JSONL)")
+    parser.add_argument("--batch-size", type=int, default=POI_DESCRIPTION_BATCH_SIZE, help="POIs per request")
+    parser.add_argument("--requests-per-minute", type=float, default=30, help="request pacing, 0 disables it")
+    parser.add_argument("--limit", type=int, default=None, help="only process the first N POIs")
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        pois = json.load(f)
+    if args.limit:
+        pois = pois[:args.limit]
+
+    store = POIDescriptionStore(args.store)
+    text_generator = PacedTextGenerator(TextGenerator(), args.requests_per_minute)
+    # Empty in-memory store for the generator, so the job never serves from what it is filling
+    generator = POIDescriptionGenerator(
+        text_generator,
+        batch_size=args.batch_size,
+        store=POIDescriptionStore(path="")
+    )
+
+    started = time.time()
+    generated = pregenerate(pois, store, generator, max(1, args.batch_size))
+    print(f"Generated {generated} descriptions in {time.time() - started:.1f}s, store now holds {len(store)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import re
+import threading
+from typing import Dict, Iterable, List, Sequence
+import numpy as np
+from config import RELEVANCE_MIN_SIMILARITY, RELEVANCE_NGRAM_RANGE, RELEVANCE_NAME_WEIGHT
+
+# Words of at least three letters ("Historic Houses and Castle" => historic, houses, and, castle)
+WORD_PATTERN = re.compile(r"[^\W\d_]{3,}")
+# Interests whose per-term similarities are kept
+SIMILARITY_CACHE_SIZE = 256
+
+
+def tag_terms(tags_text: str) -> List[str]:
+    # A POI's Tags string => its tags and the words in them, lowercased
+    tags = [tag.strip().lower() for tag in tags_text.split(',') if tag.strip()]
+    return tags + [word for tag in tags for word in WORD_PATTERN.findall(tag) if word != tag]
+
+
+def name_terms(name: str) -> List[str]:
+    return WORD_PATTERN.findall(name.lower())
+
+
+class _TextTerms:
+    # Distinct texts (Tags strings or names) => row of a sparse text x term incidence matrix
+    def __init__(self, split):
+        self.split = split
+        self.rows: Dict[str, int] = {}
+        self.indptr = [0]
+        self.indices: List[int] = []
+        # interest => relevance per registered text
+        self.scores: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def incidence(self, start: int, end: int, term_count: int):
+        # scipy (like scikit-learn below) is imported on first use, keeping it out of startup
+        from scipy import sparse
+        indptr = np.asarray(self.indptr[start:end + 1], dtype=np.int64)
+        indices = np.asarray(self.indices[indptr[0]:indptr[-1]], dtype=np.int64)
+        data = np.ones(len(indices), dtype=np.float32)
+        return sparse.csr_matrix((data, indices, indptr - indptr[0]), shape=(end - start, term_count))
+
+
+class RelevanceIndex:
+    """
+    Interest relevance of POIs, built once per POI set. Tags, the words in
+    them and the words of POI names are terms of a TF-IDF model over
+    character n-grams (fitted on the tag vocabulary); every distinct Tags
+    string and name is a row of a sparse text x term incidence matrix.
+    The relevance of a POI to an interest is the best similarity among its
+    terms: 1.0 when a tag contains the interest (the old substring rule),
+    the cosine similarity when it reaches min_similarity ("Castles" and
+    "Castle"), 0 otherwise. Scoring all texts against an interest is one
+    sparse matrix-vector operation, cached per interest.
+    """
+
+    def __init__(
+        self,
+        tags: Iterable[str] = (),
+        min_similarity: float = RELEVANCE_MIN_SIMILARITY,
+        name_weight: float = RELEVANCE_NAME_WEIGHT
+    ):
+        self.min_similarity = min_similarity
+        self.name_weight = name_weight
+        vocabulary = sorted({term for tag in tags for term in tag_terms(tag)})
+        # Without a vocabulary only the substring rule applies
+        self.vectorizer = None
+        if vocabulary:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=RELEVANCE_NGRAM_RANGE, dtype=np.float32)
+            self.vectorizer.fit(vocabulary)
+        self.terms: List[str] = []
+        self._term_ids: Dict[str, int] = {}
+        # Sparse TF-IDF rows of the terms, stacked on the next similarity query
+        self._term_blocks = []
+        self._term_vectors = None
+        # interest => similarity per registered term
+        self._similarities: Dict[str, np.ndarray] = {}
+        self._tags = _TextTerms(tag_terms)
+        self._names = _TextTerms(name_terms)
+        # Re-entrant: text scoring reads term similarities and texts as one consistent state
+        self._lock = threading.RLock()
+        self._add_terms(vocabulary)
+
+    @classmethod
+    def from_pois(cls, pois: Sequence[Dict]) -> 'RelevanceIndex':
+        # Fitted on the tags of these POIs (planning without a loaded POIManager)
+        return cls(poi.get('Tags', '') for poi in pois)
+
+    def _add_terms(self, terms: Iterable[str]) -> None:
+        # Callers hold the lock (or own the index, as in __init__)
+        new_terms = [term for term in dict.fromkeys(terms) if term not in self._term_ids]
+        if not new_terms:
+            return
+        for term in new_terms:
+            self._term_ids[term] = len(self.terms)
+            self.terms.append(term)
+        if self.vectorizer is not None:
+            self._term_blocks.append(self.vectorizer.transform(new_terms).tocsr())
+            self._term_vectors = None
+
+    def _rows(self, texts: _TextTerms, pois: Sequence[Dict], field: str) -> np.ndarray:
+        # Row of each POI's text, registering texts (and terms) seen for the first time
+        rows = texts.rows
+        try:
+            return np.fromiter((rows[poi.get(field, '')] for poi in pois), dtype=np.int32, count=len(pois))
+        except KeyError:
+            pass
+        with self._lock:
+            for poi in pois:
+                value = poi.get(field, '')
+                if value in rows:
+                    continue
+                terms = texts.split(value)
+                self._add_terms(terms)
+                texts.indices.extend(self._term_ids[term] for term in dict.fromkeys(terms))
+                texts.indptr.append(len(texts.indices))
+                rows[value] = len(rows)
+        return np.fromiter((rows[poi.get(field, '')] for poi in pois), dtype=np.int32, count=len(pois))
+
+    def term_similarities(self, interest: str) -> np.ndarray:
+        # Relevance of every registered term to the interest (0 below min_similarity)
+        interest = interest.strip().lower()
+        with self._lock:
+            cached = self._similarities.get(interest)
+            if cached is not None and len(cached) == len(self.terms):
+                return cached
+            terms = list(self.terms)
+            similarities = np.zeros(len(terms), dtype=np.float32)
+            if self.vectorizer is not None and terms:
+                if self._term_vectors is None:
+                    from scipy import sparse
+                    self._term_vectors = sparse.vstack(self._term_blocks).tocsr()
+                    self._term_blocks = [self._term_vectors]
+                query = self.vectorizer.transform([interest])
+                similarities = (self._term_vectors @ query.T).toarray().ravel().astype(np.float32)
+                similarities[similarities < self.min_similarity] = 0.0
+                if " " in interest:
+                    # "Food and Drink" is compared with whole tags, not with "food" or "drink"
+                    similarities[[i for i, term in enumerate(terms) if " " not in term]] = 0.0
+            similarities[[i for i, term in enumerate(terms) if interest in term]] = 1.0
+            if len(self._similarities) >= SIMILARITY_CACHE_SIZE:
+                self._similarities.clear()
+            self._similarities[interest] = similarities
+            return similarities
+
+    def _text_scores(self, texts: _TextTerms, interest: str) -> np.ndarray:
+        # Best term relevance of every registered text, extended as texts get registered
+        interest = interest.strip().lower()
+        with self._lock:
+            similarities = self.term_similarities(interest)
+            cached = texts.scores.get(interest)
+            count = len(texts)
+            if cached is not None and len(cached) == count:
+                return cached
+            start = 0 if cached is None else len(cached)
+            incidence = texts.incidence(start, count, len(similarities))
+            scores = incidence.multiply(similarities[np.newaxis, :]).tocsr().max(axis=1).toarray().ravel()
+            if cached is not None:
+                scores = np.concatenate([cached, scores])
+            if len(texts.scores) >= SIMILARITY_CACHE_SIZE:
+                texts.scores.clear()
+            texts.scores[interest] = scores
+            return scores
+
+    def _scores(self, texts: _TextTerms, field: str, pois: Sequence[Dict], interests: Sequence[str]) -> np.ndarray:
+        rows = self._rows(texts, pois, field)
+        scores = np.zeros((len(pois), len(interests)), dtype=np.float32)
+        for column, interest in enumerate(interests):
+            scores[:, column] = self._text_scores(texts, interest)[rows]
+        return scores
+
+    def interest_scores(self, pois: Sequence[Dict], interests: Sequence[str]) -> np.ndarray:
+        # (POIs, interests) relevance of each POI's tags to each interest, 0 = no match
+        return self._scores(self._tags, 'Tags', pois, interests)
+
+    def matches(self, pois: Sequence[Dict], interests: Sequence[str]) -> np.ndarray:
+        # (POIs, interests) booleans: does the POI match the interest
+        return self.interest_scores(pois, interests) > 0
+
+    def name_scores(self, pois: Sequence[Dict], interests: Sequence[str]) -> np.ndarray:
+        # (POIs, interests) relevance of the words in each POI's name
+        return self._scores(self._names, 'Name', pois, interests)
+
+    def ranking_scores(self, pois: Sequence[Dict], interests: Sequence[str]) -> np.ndarray:
+        # Per POI: summed tag relevance (the number of matched interests for exact matches),
+        # plus a smaller share of name relevance to order POIs with equal tags.
+        # Accumulated per interest, without the (POIs, interests) matrices
+        scores = np.zeros(len(pois), dtype=np.float32)
+        rows = self._rows(self._tags, pois, 'Tags')
+        for interest in interests:
+            scores += self._text_scores(self._tags, interest)[rows]
+        if self.name_weight:
+            rows = self._rows(self._names, pois, 'Name')
+            for interest in interests:
+                scores += self.name_weight * self._text_scores(self._names, interest)[rows]
+        return scores
+
+def relevance_for(pois: Sequence[Dict], poi_manager=None) -> RelevanceIndex:
+    # The loaded POIManager's index when there is one, otherwise one fitted on these POIs
+    if poi_manager is not None and poi_manager.source_path is not None:
+        return poi_manager.relevance
+    return RelevanceIndex.from_pois(pois)
@@ -0,0 +1,88 @@
+import math
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import SPATIAL_CELL_DEGREES
+import geo
+
+KM_PER_DEGREE = math.pi * geo.EARTH_RADIUS_KM / 180
+
+class GeoGridIndex:
+    """
+    Fixed lat/lon grid (geohash-like cells) over POI coordinates.
+    A query only computes exact haversine distances for POIs in the cells
+    overlapping the search circle; k-nearest widens the radius until
+    enough POIs are inside it.
+    """
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, cell_degrees: float = SPATIAL_CELL_DEGREES):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {}
+
+        if len(self.lats) == 0:
+            return
+        rows = np.floor(self.lats / cell_degrees).astype(np.int64)
+        cols = np.floor(self.lons / cell_degrees).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        keys = np.stack((rows[order], cols[order]), axis=1)
+        starts = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        for ids in np.split(order, starts):
+            self.cells[(int(rows[ids[0]]), int(cols[ids[0]]))] = ids
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + lat_span, 89.9))), 1e-6)
+        lon_span = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+
+        row_min, row_max = math.floor((lat - lat_span) / self.cell_degrees), math.floor((lat + lat_span) / self.cell_degrees)
+        col_min, col_max = math.floor((lon - lon_span) / self.cell_degrees), math.floor((lon + lon_span) / self.cell_degrees)
+        # Wide searches are cheaper as a plain scan than as a walk over empty cells
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self.cells):
+            return np.arange(len(self))
+
+        found = [
+            self.cells[(row, col)]
+            for row in range(row_min, row_max + 1)
+            for col in range(col_min, col_max + 1)
+            if (row, col) in self.cells
+        ]
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def radius(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        # (POI id, km) within radius_km, nearest first; allowed is an optional boolean mask
+        ids = self._candidates(lat, lon, radius_km)
+        if allowed is not None:
+            ids = ids[allowed[ids]]
+        distances = geo.distances_from(lat, lon, self.lats[ids], self.lons[ids])
+        inside = distances <= radius_km
+        ids, distances = ids[inside], distances[inside]
+        order = np.lexsort((ids, distances))
+        return [(int(ids[i]), float(distances[i])) for i in order]
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        allowed: Optional[np.ndarray] = None,
+        max_radius_km: float = math.pi * geo.EARTH_RADIUS_KM
+    ) -> List[Tuple[int, float]]:
+        # k nearest (POI id, km), nearest first
+        if k <= 0 or len(self) == 0:
+            return []
+        radius_km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            found = self.radius(lat, lon, radius_km, allowed)
+            if len(found) >= k or radius_km >= max_radius_km:
+                return found[:k]
+            radius_km = min(radius_km * 2, max_radius_km)
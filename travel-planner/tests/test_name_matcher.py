@@ -0,0 +1,35 @@
+from name_matcher import NameMatcher
+
+
+def make_matcher(*names):
+    return NameMatcher([{"Name": name} for name in names])
+
+
+def test_longest_name_wins():
+    matcher = make_matcher("Kilkenny Castle", "Kilkenny Castle Park")
+    assert matcher.match("- Kilkenny Castle Park (Kilkenny)")["Name"] == "Kilkenny Castle Park"
+
+
+def test_trailing_note_naming_another_poi_does_not_win():
+    matcher = make_matcher("Rock of Cashel", "Cashel Folk Village Museum")
+    match = matcher.match("- Rock of Cashel - then lunch near Cashel Folk Village Museum")
+    assert match["Name"] == "Rock of Cashel"
+
+
+def test_name_containing_a_dash_is_matched_whole():
+    matcher = make_matcher("Piltown", "Piltown - Mountain Grove Loop")
+    assert matcher.match("2. Piltown - Mountain Grove Loop")["Name"] == "Piltown - Mountain Grove Loop"
+
+
+def test_name_only_in_the_note_is_still_found():
+    matcher = make_matcher("Rock of Cashel")
+    assert matcher.match("- Morning: Rock of Cashel")["Name"] == "Rock of Cashel"
+
+
+def test_misspelt_name_falls_back_to_fuzzy_match():
+    matcher = make_matcher("Blarney House and Gardens", "Blarney")
+    assert matcher.match("- Blarny House and Gardens")["Name"] == "Blarney House and Gardens"
+
+
+def test_unknown_line():
+    assert make_matcher("Rock of Cashel").match("Day 1:") is None
@@ -0,0 +1,14 @@
+import pytest
+import tracing
+from planning_service import PlanningService
+
+
+def test_rejected_plan_request_is_not_traced():
+    # Validation fails before any of the service's state is used
+    service = PlanningService.__new__(PlanningService)
+    traces = tracing.REGISTRY.traces
+
+    with pytest.raises(ValueError):
+        service.plan({"interests": "Castle", "trip_duration": 2})
+
+    assert tracing.REGISTRY.traces == traces
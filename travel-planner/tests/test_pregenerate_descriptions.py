@@ -0,0 +1,47 @@
+from poi_description_store import POIDescriptionStore
+from poi_description_generator import POIDescriptionGenerator
+from pregenerate_descriptions import PacedTextGenerator, pregenerate
+
+
+class FakeTextGenerator:
+    # Answers batch prompts with text that is not JSON, single prompts with a description
+    model_name = "fake"
+
+    def __init__(self):
+        self.calls = []
+        self.invalidated = []
+
+    def generate_chat_completion(self, system_prompt, user_prompt):
+        if "JSON object" in user_prompt:
+            self.calls.append("batch")
+            return "Sorry, here are the descriptions in prose."
+        self.calls.append("single")
+        return "A fine place to visit."
+
+    def invalidate(self, system_prompt, user_prompt):
+        self.invalidated.append(user_prompt)
+
+
+def make_pois(count):
+    return [
+        {"Name": f"POI {i}", "Tags": "Castle", "AddressRegion": "Cork", "AddressLocality": "Cork"}
+        for i in range(count)
+    ]
+
+
+def test_pregenerate_survives_unparseable_batch_answers(tmp_path):
+    fake = FakeTextGenerator()
+    generator = POIDescriptionGenerator(
+        PacedTextGenerator(fake, requests_per_minute=0),
+        batch_size=3,
+        store=POIDescriptionStore(path="")
+    )
+    store = POIDescriptionStore(str(tmp_path / "descriptions.jsonl"))
+
+    generated = pregenerate(make_pois(3), store, generator, batch_size=3)
+
+    assert generated == 3
+    assert len(store) == 3
+    # The bad batch answer is invalidated each round, then the POIs are described one by one
+    assert fake.calls == ["batch", "batch", "single", "single", "single"]
+    assert len(fake.invalidated) == 2
@@ -0,0 +1,39 @@
+import time
+from llm_providers.rate_limiter import RateLimiter
+
+# Headers of a Groq response: request counts per day, token counts per minute
+GROQ_HEADERS = {
+    "x-ratelimit-limit-requests": "14400",
+    "x-ratelimit-remaining-requests": "14399",
+    "x-ratelimit-reset-requests": "6s",
+    "x-ratelimit-limit-tokens": "6000",
+    "x-ratelimit-remaining-tokens": "5900",
+    "x-ratelimit-reset-tokens": "1s",
+}
+
+
+def test_daily_request_headers_keep_the_requests_per_minute_pace():
+    limiter = RateLimiter("groq", 30, 6000, daily_request_headers=True)
+    limiter.update_from_headers(GROQ_HEADERS)
+
+    assert limiter.requests.capacity == 30
+    assert limiter.tokens.capacity == 6000
+    for _ in range(30):
+        limiter.acquire(10)
+    started = time.monotonic()
+    limiter.acquire(10)
+    # The 31st request waits for the bucket to refill (2s at 30/min)
+    assert time.monotonic() - started > 1.5
+
+
+def test_retry_delay_ignores_the_daily_request_reset():
+    headers = dict(GROQ_HEADERS, **{"x-ratelimit-reset-requests": "7h12m"})
+    limiter = RateLimiter("groq", 30, 6000, daily_request_headers=True)
+    assert limiter.retry_delay(headers, 2.0) == 1.0
+
+
+def test_per_minute_request_headers_are_applied():
+    limiter = RateLimiter("openai", 500, 30000)
+    limiter.update_from_headers({"x-ratelimit-limit-requests": "600", "x-ratelimit-reset-requests": "12s"})
+    assert limiter.requests.capacity == 600
+    assert limiter.retry_delay({"x-ratelimit-reset-requests": "12s"}, 2.0) == 12.0
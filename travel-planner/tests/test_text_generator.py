@@ -0,0 +1,53 @@
+import threading
+import time
+import text_generator
+from text_generator import TextGenerator, set_llm_slots
+
+
+class SlowBackend:
+    # Records the most calls it saw in flight at once
+    model_name = "slow"
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, system_prompt, user_prompt):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.05)
+        with self._lock:
+            self.in_flight -= 1
+        return "ok"
+
+
+def make_generator(backend):
+    generator = TextGenerator.__new__(TextGenerator)
+    generator.provider = "slow"
+    generator.backend = backend
+    generator.model_name = backend.model_name
+    generator.cache = None
+    return generator
+
+
+def test_llm_calls_share_one_cap_across_generators():
+    backend = SlowBackend()
+    generators = [make_generator(backend) for _ in range(3)]
+    previous = text_generator._llm_slots
+    set_llm_slots(threading.BoundedSemaphore(2))
+    try:
+        threads = [
+            threading.Thread(target=generator.generate_chat_completion, args=("system", f"prompt {i}"))
+            for generator in generators
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        set_llm_slots(previous)
+
+    assert backend.peak == 2
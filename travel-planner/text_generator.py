@@ -1,25 +1,172 @@
 import os
 import time
-import requests
-import openai
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, GenerationConfig
+import json
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
 from config import (
-    OPENAI_API_KEY,
-    GROQ_API_KEY,
     LLM_PROVIDER,
-    HUGGINGFACE_LLAMA_MODEL,
-    MAX_TOKENS,
     TEMPERATURE,
-    OPENAI_4O_MINI_MODEL
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MEMORY_ENTRIES,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_RECORD_PATH,
+    LLM_CONCURRENCY
 )
+from llm_providers import create_provider
+from llm_providers.replay_provider import RecordingProvider
+import tracing
 
-GROQ_DEFAULT_MODEL = "llama-3.3-70b-versatile"
+# Caps the LLM calls in flight across the process: every TextGenerator, plan, service
+# thread and batch worker takes a slot per backend call (cache hits don't need one)
+_llm_slots = threading.BoundedSemaphore(max(1, LLM_CONCURRENCY))
 
-GROQ_ENDPOINT = "https://api.groq.com/openai/v1/chat/completions"
+def set_llm_slots(slots) -> None:
+    # Replaces the cap, e.g. with a multiprocessing semaphore shared by a pool's worker processes
+    global _llm_slots
+    _llm_slots = slots
+
+class LLMCache:
+    """
+    Content-addressed cache for chat completions.
+    A small in-memory LRU sits in front of an SQLite file; both tiers
+    honour the TTL and the file is trimmed to max_entries (least recently used first).
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions (last_access)"
+        )
+        self._conn.execute(
+            "DELETE FROM completions WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, system_prompt: str, user_prompt: str) -> str:
+        # Hash of everything that influences the completion
+        payload = json.dumps(
+            [provider, model, temperature, system_prompt, user_prompt],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            # Disk hit: refresh LRU position and promote to memory
+            self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, value, created_at)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            # Evict least recently used rows above the size limit
+            self._conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                "SELECT key FROM completions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+            self._remember(key, value, now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate * 100, 2),
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries
+        }
 
 class TextGenerator:
-    def __init__(self):
+    def __init__(self, provider: str = LLM_PROVIDER):
         """
         LLM_PROVIDER can be one of:
          - "openai-3.5"     => GPT-3.5-turbo
@@ -27,132 +174,102 @@ class TextGenerator:
          - "openai-4o-mini" => GPT-4o-mini
          - "huggingface"    => local HF model
          - "groq"           => Groq LLM
+         - "replay"         => responses recorded with LLM_RECORD_PATH
+        Only the selected backend module (and its client library) is imported.
         """
-        self.provider = LLM_PROVIDER.lower()
-
-        if self.provider == "openai-3.5":
-            openai.api_key = OPENAI_API_KEY
-            self.openai_model_name = "gpt-3.5-turbo"
-            print("[TextGenerator] Using OpenAI GPT-3.5")
-
-        elif self.provider == "openai-4":
-            openai.api_key = OPENAI_API_KEY
-            self.openai_model_name = "gpt-4"
-            print("[TextGenerator] Using OpenAI GPT-4")
-
-        elif self.provider == "openai-4o-mini":
-            openai.api_key = OPENAI_API_KEY
-            self.openai_model_name = OPENAI_4O_MINI_MODEL
-            print("[TextGenerator] Using OpenAI GPT-4o-mini")
-
-        elif self.provider == "huggingface":
-            print(f"[TextGenerator] Loading local HuggingFace model: {HUGGINGFACE_LLAMA_MODEL} ...")
-            self.tokenizer = AutoTokenizer.from_pretrained(HUGGINGFACE_LLAMA_MODEL)
-            self.model = AutoModelForCausalLM.from_pretrained(
-                HUGGINGFACE_LLAMA_MODEL,
-                device_map="auto",
-                torch_dtype=torch.float16
-            )
-            self.generation_config = GenerationConfig(
-                max_new_tokens=512,
-                temperature=TEMPERATURE
-            )
-            print("[TextGenerator] Model loaded successfully (HF).")
+        self.provider = provider.lower()
+        self.backend = create_provider(self.provider)
+        if LLM_RECORD_PATH and self.provider != "replay":
+            self.backend = RecordingProvider(self.backend, LLM_RECORD_PATH)
+        self.model_name = self.backend.model_name
 
-        elif self.provider == "groq":
-            if not GROQ_API_KEY:
-                raise ValueError("No GROQ_API_KEY found in environment/config.")
-            self.groq_model = GROQ_DEFAULT_MODEL
-            print(f"[TextGenerator] Using Groq model: {self.groq_model}")
-
-        else:
-            raise ValueError(f"Unknown LLM_PROVIDER: {LLM_PROVIDER}")
+        self.cache = LLMCache() if LLM_CACHE_ENABLED and self.backend.cacheable else None
 
     def generate_chat_completion(self, system_prompt: str, user_prompt: str) -> str:
-        # Text based on provider
-        if self.provider in ("openai-3.5", "openai-4", "openai-4o-mini"):
-            return self._generate_openai(system_prompt, user_prompt)
-        elif self.provider == "huggingface":
-            return self._generate_huggingface(system_prompt, user_prompt)
-        elif self.provider == "groq":
-            return self._generate_groq(system_prompt, user_prompt)
-        else:
-            return "Error: Provider not implemented!"
-
-    def _generate_openai(self, system_prompt: str, user_prompt: str) -> str:
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        try:
-            response = openai.chat.completions.create(
-                model=self.openai_model_name,
-                messages=messages,
-                max_tokens=MAX_TOKENS,
-                temperature=TEMPERATURE
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"[OpenAI Error] {str(e)}")
-            return "Error: unable to get response from OpenAI."
-
-    def _generate_huggingface(self, system_prompt: str, user_prompt: str) -> str:
-        combined_prompt = f"System: {system_prompt}\nUser: {user_prompt}\nAssistant:"
-        inputs = self.tokenizer(combined_prompt, return_tensors="pt").to(self.model.device)
-
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=self.generation_config.max_new_tokens,
-                temperature=self.generation_config.temperature
-            )
+        # Serve repeated prompts from the cache, only successful answers are stored
+        with tracing.span(tracing.LLM_SPAN, provider=self.provider, model=self.model_name, cache_hits=0) as span:
+            if self.cache is None:
+                return self._traced_generate(span, system_prompt, user_prompt)
 
-        text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        if "Assistant:" in text:
-            text = text.split("Assistant:")[-1]
-        return text.strip()
+            key = LLMCache.make_key(self.provider, self.model_name, TEMPERATURE, system_prompt, user_prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                span.record(cache_hits=1)
+                return cached
 
-    def _generate_groq(self, system_prompt: str, user_prompt: str) -> str:
-        url = GROQ_ENDPOINT
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
+            text = self._traced_generate(span, system_prompt, user_prompt)
+            if not text.startswith("Error"):
+                self.cache.set(key, text)
+            return text
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        payload = {
-            "model": self.groq_model,
-            "messages": messages,
-            "max_completion_tokens": MAX_TOKENS,
-            "temperature": TEMPERATURE
-        }
+    def _traced_generate(self, span, system_prompt: str, user_prompt: str) -> str:
+        # Providers report tokens and retries into the active span themselves
+        with _llm_slots:
+            text = self.backend.generate(system_prompt, user_prompt)
+        if text.startswith("Error"):
+            span.record(error=text)
+        return text
+
+    def generate_chat_completions(self, prompts: List[Tuple[str, str]]) -> List[str]:
+        # Batch API over (system_prompt, user_prompt) pairs; cache misses go to the backend together
+        with tracing.span(tracing.LLM_SPAN, provider=self.provider, model=self.model_name, prompts=len(prompts)) as span:
+            results: List[Optional[str]] = [None] * len(prompts)
+            keys = [None] * len(prompts)
+            missing = []
+            for i, (system_prompt, user_prompt) in enumerate(prompts):
+                if self.cache is not None:
+                    keys[i] = LLMCache.make_key(self.provider, self.model_name, TEMPERATURE, system_prompt, user_prompt)
+                    results[i] = self.cache.get(keys[i])
+                if results[i] is None:
+                    missing.append(i)
+            span.record(cache_hits=len(prompts) - len(missing))
+
+            if missing:
+                with _llm_slots:
+                    texts = self.backend.generate_batch([prompts[i] for i in missing])
+                for i, text in zip(missing, texts):
+                    results[i] = text
+                    if text.startswith("Error"):
+                        span.record(error=text)
+                    elif self.cache is not None:
+                        self.cache.set(keys[i], text)
+            return results
+
+    def stream_chat_completion(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        # Yields the completion piece by piece as the provider produces it.
+        # Cached answers come back as a single piece; complete streamed answers are cached
+        with tracing.span(
+            tracing.LLM_SPAN, provider=self.provider, model=self.model_name, cache_hits=0, streamed=True
+        ) as span:
+            key = None
+            if self.cache is not None:
+                key = LLMCache.make_key(self.provider, self.model_name, TEMPERATURE, system_prompt, user_prompt)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    span.record(cache_hits=1)
+                    yield cached
+                    return
+
+            parts = []
+            # The slot is held until the stream ends (or the consumer stops reading)
+            with _llm_slots:
+                for chunk in self.backend.stream(system_prompt, user_prompt):
+                    parts.append(chunk)
+                    yield chunk
+
+            # Providers report failures as an "Error: ..." piece, possibly after partial output
+            text = "".join(parts).strip()
+            failed = any(part.startswith("Error") for part in parts)
+            if failed:
+                span.record(error=next(part for part in parts if part.startswith("Error")))
+            if key is not None and text and not failed:
+                self.cache.set(key, text)
+
+    def invalidate(self, system_prompt: str, user_prompt: str) -> None:
+        # Drops a cached answer the caller could not use (e.g. unparseable), so asking
+        # again reaches the backend instead of returning the same answer
+        if self.cache is not None:
+            self.cache.delete(LLMCache.make_key(self.provider, self.model_name, TEMPERATURE, system_prompt, user_prompt))
 
-        max_retries = 5
-        backoff_seconds = 2.0
-
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(url, headers=headers, json=payload, timeout=90)
-                response.raise_for_status()
-                data = response.json()
-                return data["choices"][0]["message"]["content"].strip()
-
-            except requests.exceptions.HTTPError as http_err:
-                # If 429 rate limit, try again
-                if response.status_code == 429 and attempt < max_retries - 1:
-                    print(f"[Groq Rate Limit] Attempt {attempt+1}/{max_retries} - waiting {backoff_seconds:.1f}s")
-                    time.sleep(backoff_seconds)
-                    backoff_seconds *= 2
-                    continue
-                else:
-                    print(f"[Groq HTTP Error] {http_err}")
-                    print(f"Response content: {response.text}")
-                    return "Error: unable to get response from Groq."
-            except Exception as e:
-                print(f"[Groq Error] {str(e)}")
-                return "Error: unexpected issue in Groq request."
-
-        return "Error: max retries exceeded for Groq"
+    def cache_stats(self) -> Optional[dict]:
+        return self.cache.stats() if self.cache is not None else None
@@ -0,0 +1,289 @@
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Lightweight tracing of one plan run. A Trace collects timed Spans; the active trace and
+# span live in context variables, so nested spans find their parent on their own and
+# work submitted to a thread pool through bind() reports into the span that submitted it.
+# Everything here is a no-op while no trace is active.
+#
+#   with tracing.trace("plan") as run:
+#       with tracing.span("organize"):
+#           ...
+#           tracing.record(prompt_tokens=812, completion_tokens=140)
+#   run.to_dict()          => the "_metrics" block of a plan
+#   REGISTRY.prometheus()  => counters over every finished trace, Prometheus text format
+
+LLM_SPAN = "llm_call"
+FALLBACK_SPAN = "fallback"
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], start: float, attributes: Dict):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.end = None
+        self.attributes = attributes
+
+    def record(self, **values) -> None:
+        # Numbers add up (tokens, retries), everything else overwrites
+        for key, value in values.items():
+            current = self.attributes.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(current, (int, float)):
+                self.attributes[key] = current + value
+            else:
+                self.attributes[key] = value
+
+
+class _NullSpan:
+    # Handed out while nothing is being traced
+    def record(self, **values) -> None:
+        return
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.finished = None
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def open_span(self, name: str, parent: Optional[Span], attributes: Dict) -> Span:
+        with self._lock:
+            span = Span(name, len(self.spans) + 1, parent.span_id if parent else None,
+                        time.perf_counter() - self.started, attributes)
+            self.spans.append(span)
+        return span
+
+    def close_span(self, span: Span) -> None:
+        span.end = time.perf_counter() - self.started
+
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def llm_totals(self) -> Dict:
+        totals = _empty_llm_totals()
+        for span in self._snapshot():
+            if span.name == LLM_SPAN:
+                _add_llm_span(totals, span.attributes)
+        return totals
+
+    def stage_totals(self) -> Dict[str, Dict]:
+        stages = {}
+        for span in self._snapshot():
+            if span.end is None or span.name == LLM_SPAN:
+                continue
+            entry = stages.setdefault(span.name, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += span.end - span.start
+        return {name: {"count": entry["count"], "seconds": round(entry["seconds"], 4)} for name, entry in stages.items()}
+
+    def fallback_used(self) -> bool:
+        return any(span.name == FALLBACK_SPAN for span in self._snapshot())
+
+    def to_dict(self) -> Dict:
+        spans = []
+        for span in self._snapshot():
+            entry = {
+                "id": span.span_id,
+                "parent": span.parent_id,
+                "name": span.name,
+                "start_s": round(span.start, 4),
+                "duration_s": round(span.end - span.start, 4) if span.end is not None else None
+            }
+            entry.update(span.attributes)
+            spans.append(entry)
+        return {
+            "trace_id": self.trace_id,
+            "total_seconds": round(self.elapsed(), 4),
+            "fallback": self.fallback_used(),
+            "llm": self.llm_totals(),
+            "stages": self.stage_totals(),
+            "spans": spans
+        }
+
+    def _snapshot(self) -> List[Span]:
+        with self._lock:
+            return list(self.spans)
+
+
+def _empty_llm_totals() -> Dict[str, int]:
+    return {"calls": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0, "retries": 0, "errors": 0}
+
+
+def _add_llm_span(totals: Dict[str, int], attributes: Dict) -> None:
+    # An llm_call span covers "prompts" completions (1 unless batched)
+    totals["calls"] += attributes.get("prompts", 1)
+    totals["cache_hits"] += attributes.get("cache_hits", 0)
+    totals["prompt_tokens"] += attributes.get("prompt_tokens", 0)
+    totals["completion_tokens"] += attributes.get("completion_tokens", 0)
+    totals["retries"] += attributes.get("retries", 0)
+    totals["errors"] += int(bool(attributes.get("error")))
+
+
+class MetricsRegistry:
+    """
+    Counters accumulated over finished traces, exported in the Prometheus
+    text exposition format.
+    """
+
+    PREFIX = "travel_planner"
+
+    def __init__(self):
+        self.traces = 0
+        self.fallbacks = 0
+        # (stage) => [count, seconds]
+        self.stages: Dict[str, List[float]] = {}
+        # (provider, model) => totals as in Trace.llm_totals
+        self.llm: Dict[tuple, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, trace: Trace) -> None:
+        spans = trace._snapshot()
+        with self._lock:
+            self.traces += 1
+            self.fallbacks += int(trace.fallback_used())
+            for name, entry in trace.stage_totals().items():
+                stage = self.stages.setdefault(name, [0, 0.0])
+                stage[0] += entry["count"]
+                stage[1] += entry["seconds"]
+            for span in spans:
+                if span.name != LLM_SPAN:
+                    continue
+                key = (str(span.attributes.get("provider", "")), str(span.attributes.get("model", "")))
+                _add_llm_span(self.llm.setdefault(key, _empty_llm_totals()), span.attributes)
+
+    def prometheus(self) -> str:
+        lines = []
+
+        def metric(name: str, help_text: str, samples: List[tuple]) -> None:
+            full_name = f"{self.PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} counter")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape_label(str(val))}"' for key, val in labels.items())
+                lines.append(f"{full_name}{{{label_text}}} {value}" if label_text else f"{full_name} {value}")
+
+        with self._lock:
+            metric("traces_total", "Traced plan runs.", [({}, self.traces)])
+            metric("fallbacks_total", "Runs where the day list fell back to interest ranking.", [({}, self.fallbacks)])
+            metric("stage_calls_total", "Spans per stage.",
+                   [({"stage": name}, int(entry[0])) for name, entry in sorted(self.stages.items())])
+            metric("stage_seconds_total", "Seconds spent per stage.",
+                   [({"stage": name}, round(entry[1], 6)) for name, entry in sorted(self.stages.items())])
+            llm = sorted(self.llm.items())
+            metric("llm_calls_total", "LLM completions requested.",
+                   [({"provider": p, "model": m}, totals["calls"]) for (p, m), totals in llm])
+            metric("llm_cache_hits_total", "LLM completions served from the cache.",
+                   [({"provider": p, "model": m}, totals["cache_hits"]) for (p, m), totals in llm])
+            metric("llm_tokens_total", "Prompt and completion tokens reported by the providers.",
+                   [({"provider": p, "model": m, "kind": "prompt"}, totals["prompt_tokens"]) for (p, m), totals in llm]
+                   + [({"provider": p, "model": m, "kind": "completion"}, totals["completion_tokens"]) for (p, m), totals in llm])
+            metric("llm_retries_total", "Provider retries after rate limiting.",
+                   [({"provider": p, "model": m}, totals["retries"]) for (p, m), totals in llm])
+            metric("llm_errors_total", "LLM calls that ended in an error.",
+                   [({"provider": p, "model": m}, totals["errors"]) for (p, m), totals in llm])
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Process-wide counters over every finished trace (planning_service.py serves them on /metrics)
+REGISTRY = MetricsRegistry()
+
+
+def prometheus_text(run: Trace) -> str:
+    # Prometheus export of a single trace (e.g. next to the travel_plan.json it produced)
+    registry = MetricsRegistry()
+    registry.observe(run)
+    return registry.prometheus()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str = "plan"):
+    # Joins the active trace if there is one, otherwise starts (and on exit finishes) a new one
+    active = _current_trace.get()
+    if active is not None:
+        yield active
+        return
+    new_trace = Trace(name)
+    trace_token = _current_trace.set(new_trace)
+    span_token = _current_span.set(None)
+    try:
+        yield new_trace
+    finally:
+        new_trace.finished = time.perf_counter()
+        _reset(_current_span, span_token, None)
+        _reset(_current_trace, trace_token, None)
+        REGISTRY.observe(new_trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    active = _current_trace.get()
+    if active is None:
+        yield NULL_SPAN
+        return
+    parent = _current_span.get()
+    new_span = active.open_span(name, parent, attributes)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except Exception as e:
+        new_span.record(error=str(e))
+        raise
+    finally:
+        active.close_span(new_span)
+        _reset(_current_span, token, parent)
+
+
+def record(**values) -> None:
+    # Adds to the innermost active span (token counts, retries, flags)
+    current = _current_span.get()
+    if current is not None:
+        current.record(**values)
+
+
+def bind(fn: Callable, span_name: Optional[str] = None, **attributes) -> Callable:
+    # fn, ready to run on another thread inside the current trace (and optionally in its own span).
+    # Call bind() once per submission: a copied context can only be entered by one thread at a time
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        if span_name is None:
+            return context.run(fn, *args, **kwargs)
+        return context.run(_run_in_span, fn, span_name, attributes, args, kwargs)
+    return run
+
+
+def _run_in_span(fn: Callable, span_name: str, attributes: Dict, args: tuple, kwargs: dict):
+    with span(span_name, **attributes):
+        return fn(*args, **kwargs)
+
+
+def _reset(variable: contextvars.ContextVar, token, fallback) -> None:
+    # A generator suspended inside a span may be resumed from another context,
+    # where the token is not valid; fall back to setting the previous value
+    try:
+        variable.reset(token)
+    except ValueError:
+        variable.set(fallback)
@@ -1,26 +1,47 @@
-from typing import Dict, List
+import copy
+from typing import Dict, List, Optional, Set
+import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from poi_description_generator import POIDescriptionGenerator
 from user_preferences import UserPreferences
 from text_generator import TextGenerator
+from poi_manager import POIManager
+from itinerary_engine import ItineraryEngine
+from candidate_shortlist import CandidateShortlister
+from name_matcher import NameMatcher
+from relevance_index import relevance_for
+from config import LLM_CONCURRENCY, PLANNING_MODE, TRACE_METRICS, MIN_ACTIVITIES_PER_DAY, MAX_ACTIVITIES_PER_DAY
+import geo
+import tracing
 
 class TravelPlanner:
-    def __init__(self, text_generator: TextGenerator):
+    def __init__(
+        self,
+        text_generator: TextGenerator,
+        max_concurrency: int = LLM_CONCURRENCY,
+        poi_manager: Optional[POIManager] = None,
+        planning_mode: str = PLANNING_MODE
+    ):
         self.description_generator = POIDescriptionGenerator(text_generator)
+        # Upper bound on LLM calls in flight at once
+        self.max_concurrency = max(1, max_concurrency)
+        # Loaded POIManager used for "also nearby" suggestions (optional)
+        self.poi_manager = poi_manager
+        if planning_mode not in ("llm", "local"):
+            raise ValueError(f"Unknown PLANNING_MODE: {planning_mode}")
+        self.planning_mode = planning_mode
+        self.itinerary_engine = ItineraryEngine(poi_manager)
+        self.shortlister = CandidateShortlister()
 
     def _calculate_interests_accuracy(self, organized_days: List[List[Dict]], interests: List[str]) -> dict:
         # Evaluate how well the plan matches user interests
+        pois = [poi for day in organized_days for poi in day]
+        total_pois = len(pois)
+        matches = self._relevance(pois).matches(pois, interests).sum(axis=0)
         interest_matches = {interest: 0 for interest in interests}
-        total_pois = 0
-
-        for day in organized_days:
-            for poi in day:
-                total_pois += 1
-                poi_tags = poi['Tags'].lower().split(',')
-                poi_tags = [tag.strip() for tag in poi_tags]
-                for interest in interests:
-                    if any(interest.lower() in tag for tag in poi_tags):
-                        interest_matches[interest] += 1
+        for interest, count in zip(interests, matches.tolist()):
+            interest_matches[interest] += count
 
         # Per-interest percentages
         accuracy_per_interest = {}
@@ -50,56 +71,352 @@ class TravelPlanner:
 
     def generate_travel_plan(self, poi_data: Dict, preferences: UserPreferences) -> Dict:
         # Organizes a multi-day trip
-        all_pois = []
-        for region_pois in poi_data["by_region"].values():
-            all_pois.extend(region_pois)
+        plan = None
+        with tracing.trace("plan") as run:
+            for event, payload in self.iter_travel_plan(poi_data, preferences):
+                if event == "plan":
+                    plan = payload
+        if plan is not None and TRACE_METRICS:
+            # How the plan was produced: spans, LLM calls/tokens/cache hits, fallback
+            plan["_metrics"] = run.to_dict()
+        return plan
+
+    def iter_travel_plan(self, poi_data: Dict, preferences: UserPreferences):
+        # Builds the plan and yields (section, payload) events in display order:
+        #   ("trip_summary", text)
+        #   ("interests_accuracy", dict)
+        #   ("day", day plan)              - one per day, in day order
+        #   ("general_tips", text)
+        #   ("plan", complete plan)
+        all_pois = self._all_pois(poi_data)
 
         # AI-based organization
-        organized_days = self._organize_days(all_pois, preferences)
+        with tracing.span("organize"):
+            organized_days = self._organize_days(all_pois, preferences)
         # How well the final plan matches user interests
         interests_accuracy = self._calculate_interests_accuracy(organized_days, preferences.interests)
 
-        plan = {
-            "trip_summary": self._generate_trip_summary(organized_days, preferences),
-            "days": [],
-            "general_tips": self.description_generator.generate_itinerary_tips(
-                preferences.to_dict(), all_pois
-            ),
-            "interests_accuracy": interests_accuracy
-        }
+        # Summary, tips, day summaries and POI descriptions are independent of each other,
+        # so they are all submitted at once and collected back in plan order
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            trip_summary = executor.submit(
+                tracing.bind(self._generate_trip_summary, "trip_summary"), organized_days, preferences
+            )
+            general_tips = executor.submit(
+                tracing.bind(self.description_generator.generate_itinerary_tips, "tips"), preferences.to_dict(), all_pois
+            )
+            day_jobs = self._submit_day_jobs(executor, organized_days)
+
+            trip_summary_text = trip_summary.result()
+            yield "trip_summary", trip_summary_text
+            yield "interests_accuracy", interests_accuracy
+
+            plan = {
+                "trip_summary": trip_summary_text,
+                "days": [],
+                "general_tips": None,
+                "interests_accuracy": interests_accuracy
+            }
 
-        # Build day-by-day plan details
-        for day_number, day_pois in enumerate(organized_days, 1):
-            day_plan = self._create_day_plan(day_number, day_pois, preferences)
-            plan["days"].append(day_plan)
+            # Build day-by-day plan details
+            for day_plan in self._collect_day_plans(organized_days, day_jobs, preferences, poi_data.get("loaded")):
+                plan["days"].append(day_plan)
+                yield "day", day_plan
+
+            plan["general_tips"] = general_tips.result()
+            yield "general_tips", plan["general_tips"]
+
+        yield "plan", plan
+
+    def add_plan_stages(
+        self, scheduler, preferences: UserPreferences, pois_stage: str = "pois", on_summary_piece=None, on_day=None
+    ) -> None:
+        # Declares the plan as pipeline.StageScheduler stages on top of `pois_stage` (which
+        # yields the load_and_filter_pois dict), so callers can hang their own stages on them:
+        #   organize, tips          <- pois     (tips only need the POI list, not the days)
+        #   summary, accuracy, days <- organize
+        #   plan                    <- summary, accuracy, days, tips
+        # on_summary_piece receives the trip summary piece by piece as it is streamed,
+        # on_day each day plan (in day order) as soon as it is complete
+        def organize(poi_data):
+            return self._organize_days(self._all_pois(poi_data), preferences)
+
+        def tips(poi_data):
+            return self.description_generator.generate_itinerary_tips(preferences.to_dict(), self._all_pois(poi_data))
+
+        def summary(organized_days):
+            if on_summary_piece is None:
+                return self._generate_trip_summary(organized_days, preferences)
+            summary_parts = []
+            for piece in self._stream_trip_summary(organized_days, preferences):
+                summary_parts.append(piece)
+                on_summary_piece(piece)
+            return "".join(summary_parts).strip()
+
+        def accuracy(organized_days):
+            return self._calculate_interests_accuracy(organized_days, preferences.interests)
+
+        def days(organized_days, poi_data):
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                day_jobs = self._submit_day_jobs(executor, organized_days)
+                day_plans = []
+                for day_plan in self._collect_day_plans(organized_days, day_jobs, preferences, poi_data.get("loaded")):
+                    day_plans.append(day_plan)
+                    if on_day is not None:
+                        on_day(day_plan)
+                return day_plans
+
+        def plan(trip_summary, interests_accuracy, day_plans, general_tips):
+            return {
+                "trip_summary": trip_summary,
+                "days": day_plans,
+                "general_tips": general_tips,
+                "interests_accuracy": interests_accuracy
+            }
+
+        scheduler.add("organize", organize, [pois_stage])
+        scheduler.add("tips", tips, [pois_stage])
+        scheduler.add("summary", summary, ["organize"])
+        scheduler.add("accuracy", accuracy, ["organize"])
+        scheduler.add("days", days, ["organize", pois_stage])
+        scheduler.add("plan", plan, ["summary", "accuracy", "days", "tips"])
+
+    def apply_edit(self, plan: Dict, edit: Dict, preferences: UserPreferences, poi_data: Optional[Dict] = None) -> Dict:
+        # Returns a copy of the plan with one edit applied, rebuilding only the edited day:
+        #   {"type": "replace_poi", "day": 2, "name": "...", "replacement": "..."}   replacement optional
+        #   {"type": "reorder_day", "day": 2, "order": ["...", "..."]}
+        #   {"type": "set_activity_count", "day": 2, "count": 4}
+        # Descriptions of kept POIs, the other days, the trip summary and the tips are reused;
+        # new POIs take one batched description request and the day summary one more.
+        # Replacements and added POIs come from poi_data (the load_and_filter_pois dict)
+        # or else from the loaded POIManager filtered by the preferences.
+        # Raises ValueError for edits that don't fit the plan
+        with tracing.trace("replan") as run:
+            plan = copy.deepcopy(plan)
+            plan.pop("_metrics", None)
+            lookup = self._poi_lookup(poi_data)
+            organized_days = [
+                [self._planned_poi(activity["name"], lookup) for activity in day_plan["activities"]]
+                for day_plan in plan["days"]
+            ]
+
+            day_number = edit.get("day")
+            if not isinstance(day_number, int) or not 1 <= day_number <= len(organized_days):
+                raise ValueError(f"Day must be between 1 and {len(organized_days)}")
+            old_day = organized_days[day_number - 1]
+            planned_names = {poi['Name'] for day_pois in organized_days for poi in day_pois}
 
+            with tracing.span("edit", type=edit.get("type")):
+                new_day = self._edited_day(edit, old_day, planned_names, preferences, poi_data)
+            organized_days[day_number - 1] = new_day
+            planned_names = {poi['Name'] for day_pois in organized_days for poi in day_pois}
+
+            descriptions = {
+                activity["name"]: activity["description"] for activity in plan["days"][day_number - 1]["activities"]
+            }
+            new_pois = [poi for poi in new_day if poi['Name'] not in descriptions]
+            day_summary = plan["days"][day_number - 1]["day_summary"]
+            if new_pois or len(new_day) != len(old_day):
+                # Same POIs in another order keep their summary; anything else gets a new one
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    summary_job = executor.submit(
+                        tracing.bind(self.description_generator.generate_day_summary, "day_summary", day=day_number),
+                        new_day
+                    )
+                    if new_pois:
+                        describe = tracing.bind(
+                            self.description_generator.generate_poi_descriptions, "poi_descriptions", day=day_number
+                        )
+                        descriptions.update(describe(new_pois))
+                    day_summary = summary_job.result()
+
+            # The POI set poi_data was filtered from, for the nearby queries
+            loaded = poi_data.get("loaded") if poi_data is not None else None
+            plan["days"][day_number - 1] = self._create_day_plan(
+                day_number, new_day, preferences, day_summary,
+                [descriptions[poi['Name']] for poi in new_day], planned_names, loaded
+            )
+            if self.poi_manager is not None:
+                # "Also nearby" of the other days must not point at the POIs planned now
+                self._refresh_nearby(plan, organized_days, planned_names, preferences, loaded)
+            plan["interests_accuracy"] = self._calculate_interests_accuracy(organized_days, preferences.interests)
+
+        if TRACE_METRICS:
+            plan["_metrics"] = run.to_dict()
         return plan
 
+    def _edited_day(
+        self,
+        edit: Dict,
+        day_pois: List[Dict],
+        planned_names: Set[str],
+        preferences: UserPreferences,
+        poi_data: Optional[Dict]
+    ) -> List[Dict]:
+        # The day's POIs after the edit
+        names = [poi['Name'] for poi in day_pois]
+        edit_type = edit.get("type")
+
+        if edit_type == "replace_poi":
+            name = edit.get("name")
+            if name not in names:
+                raise ValueError(f"'{name}' is not planned on day {edit.get('day')}")
+            replacement_name = edit.get("replacement")
+            if replacement_name is not None:
+                if replacement_name in planned_names:
+                    raise ValueError(f"'{replacement_name}' is already part of the plan")
+                replacement = self._planned_poi(replacement_name, self._poi_lookup(poi_data))
+            else:
+                # Near the rest of the day; the rejected POI is not offered again
+                kept = [poi for poi in day_pois if poi['Name'] != name] or day_pois
+                replacement = self._best_candidates(poi_data, preferences, planned_names, kept, 1)[0]
+            return [replacement if poi['Name'] == name else poi for poi in day_pois]
+
+        if edit_type == "reorder_day":
+            order = edit.get("order")
+            if not isinstance(order, list) or sorted(order) != sorted(names):
+                raise ValueError(f"Order must list exactly the POIs of day {edit.get('day')}")
+            by_name = {poi['Name']: poi for poi in day_pois}
+            return [by_name[name] for name in order]
+
+        if edit_type == "set_activity_count":
+            count = edit.get("count")
+            if not isinstance(count, int) or not MIN_ACTIVITIES_PER_DAY <= count <= MAX_ACTIVITIES_PER_DAY:
+                raise ValueError(
+                    f"Activity count must be between {MIN_ACTIVITIES_PER_DAY} and {MAX_ACTIVITIES_PER_DAY}"
+                )
+            if count <= len(day_pois):
+                return day_pois[:count]
+            added = self._best_candidates(poi_data, preferences, planned_names, day_pois, count - len(day_pois))
+            return day_pois + added
+
+        raise ValueError(f"Unknown edit type: {edit_type}")
+
+    def _poi_lookup(self, poi_data: Optional[Dict]):
+        # Name => POI record, from poi_data when given, else from the loaded POIManager
+        if poi_data is not None:
+            return {poi['Name']: poi for poi in self._all_pois(poi_data)}.get
+        if self.poi_manager is not None:
+            return self.poi_manager.poi_by_name
+        raise ValueError("Editing a plan needs the POI data or a loaded POIManager")
+
+    @staticmethod
+    def _planned_poi(name: str, lookup) -> Dict:
+        poi = lookup(name)
+        if poi is None:
+            raise ValueError(f"Unknown POI: {name}")
+        return poi
+
+    def _best_candidates(
+        self,
+        poi_data: Optional[Dict],
+        preferences: UserPreferences,
+        exclude_names: Set[str],
+        near_pois: List[Dict],
+        count: int
+    ) -> List[Dict]:
+        # The count most relevant unplanned POIs; among equals the ones closest to near_pois
+        if poi_data is not None:
+            candidates = self._all_pois(poi_data)
+        elif self.poi_manager is not None:
+            candidates = self.poi_manager._filter_pois(preferences)
+        else:
+            raise ValueError("Editing a plan needs the POI data or a loaded POIManager")
+        pool = [poi for poi in candidates if poi['Name'] not in exclude_names]
+        if len(pool) < count:
+            raise ValueError("Not enough unplanned POIs left for this edit")
+
+        scores = self._relevance(pool).interest_scores(pool, preferences.interests).sum(axis=1)
+        near_lats, near_lons = POIManager.coordinates(near_pois)
+        lats, lons = POIManager.coordinates(pool)
+        distances = geo.distances_from(float(near_lats.mean()), float(near_lons.mean()), lats, lons)
+        return [pool[i] for i in np.lexsort((distances, -scores))[:count]]
+
+    def _refresh_nearby(
+        self,
+        plan: Dict,
+        organized_days: List[List[Dict]],
+        planned_names: Set[str],
+        preferences: UserPreferences,
+        loaded=None
+    ) -> None:
+        # Local grid queries only, no LLM call
+        for day_plan, day_pois in zip(plan["days"], organized_days):
+            for activity, poi in zip(day_plan["activities"], day_pois):
+                activity["also_nearby"] = self.poi_manager.nearby_suggestions(
+                    poi, planned_names, preferences.interests, loaded=loaded
+                )
+
+    def _relevance(self, pois: List[Dict]):
+        # Interest relevance of the loaded POI set, shared with POIManager
+        return relevance_for(pois, self.poi_manager)
+
+    def _all_pois(self, poi_data: Dict) -> List[Dict]:
+        all_pois = []
+        for region_pois in poi_data["by_region"].values():
+            all_pois.extend(region_pois)
+        return all_pois
+
+    def _submit_day_jobs(self, executor, organized_days: List[List[Dict]]) -> list:
+        day_jobs = []
+        for day_number, day_pois in enumerate(organized_days, 1):
+            day_summary = executor.submit(
+                tracing.bind(self.description_generator.generate_day_summary, "day_summary", day=day_number), day_pois
+            )
+            # One batched request describes all POIs of the day
+            descriptions = executor.submit(
+                tracing.bind(self.description_generator.generate_poi_descriptions, "poi_descriptions", day=day_number),
+                day_pois
+            )
+            day_jobs.append((day_summary, descriptions))
+        return day_jobs
+
+    def _collect_day_plans(
+        self, organized_days: List[List[Dict]], day_jobs: list, preferences: UserPreferences, loaded=None
+    ):
+        # Yields the day plans in day order as their jobs complete; loaded is the POI set
+        # (poi_manager.LoadedPOIs) the days were planned from
+        planned_names = {poi['Name'] for day_pois in organized_days for poi in day_pois}
+        for day_number, (day_pois, (day_summary, descriptions)) in enumerate(zip(organized_days, day_jobs), 1):
+            yield self._create_day_plan(
+                day_number,
+                day_pois,
+                preferences,
+                day_summary.result(),
+                [descriptions.result()[poi['Name']] for poi in day_pois],
+                planned_names,
+                loaded
+            )
+
     def _organize_days(self, pois: List[Dict], preferences: UserPreferences) -> List[List[Dict]]:
         # Create a day-by-day trip with EXACT number of POIs per day
-        filtered_pois = []
-        for poi in pois:
-            poi_tags = poi['Tags'].lower().split(',')
-            poi_tags = [tag.strip() for tag in poi_tags]
-            if any(interest.lower() in tag for interest in preferences.interests for tag in poi_tags):
-                filtered_pois.append(poi)
+        if self.planning_mode == "local":
+            # Geo clustering + route optimization, no LLM round-trip
+            return self.itinerary_engine.organize_days(pois, preferences)
+
+        relevance = self._relevance(pois)
+        matching = relevance.matches(pois, preferences.interests).any(axis=1)
+        filtered_pois = [poi for poi, matched in zip(pois, matching.tolist()) if matched]
 
         needed = preferences.trip_duration * preferences.realization_of_pois_per_day
         if len(filtered_pois) < needed:
             filtered_pois = pois
 
+        # Only a bounded, ranked shortlist goes into the prompt
+        filtered_pois = self.shortlister.shortlist(filtered_pois, preferences, relevance)
+
         poi_info = []
-        for poi in filtered_pois:
-            tags = poi['Tags'].split(',')
-            matching_interests = [
-                interest for interest in preferences.interests
-                if any(interest.lower() in tag.lower() for tag in tags)
-            ]
+        interest_matches = relevance.matches(filtered_pois, preferences.interests)
+        for poi, matched in zip(filtered_pois, interest_matches.tolist()):
+            matching_interests = [interest for interest, hit in zip(preferences.interests, matched) if hit]
             info = f"- {poi['Name']} ({poi['AddressRegion']})"
             if matching_interests:
                 info += f" [Matches interests: {', '.join(matching_interests)}]"
             poi_info.append(info)
 
+        kept = self.shortlister.fit_to_budget(poi_info, needed)
+        filtered_pois, poi_info = filtered_pois[:kept], poi_info[:kept]
+
         user_prompt = f"""
         Create a {preferences.trip_duration}-day travel plan with EXACTLY {preferences.realization_of_pois_per_day} activities per day.
 
@@ -131,31 +448,29 @@ class TravelPlanner:
             system_prompt, user_prompt
         )
         # Text back into a list of days
-        organized_days = self._parse_organized_days(plan_text, filtered_pois, preferences)
+        with tracing.span("parse"):
+            organized_days = self._parse_organized_days(plan_text, filtered_pois, preferences)
         return organized_days
 
     def _parse_organized_days(self, organized_text: str, pois: List[Dict], preferences: UserPreferences) -> List[List[Dict]]:
         # LLM raw textual plan into a structured list of days
         organized_days = []
         current_day = []
+        matcher = NameMatcher(pois)
 
         lines = organized_text.split('\n')
         for line in lines:
             line = line.strip()
             if not line:
                 continue
-            if line.lower().startswith('day '):
-                # Start of a new day block
+            if line.lstrip('*#_ ').lower().startswith('day '):
+                # Start of a new day block (also when wrapped in markdown, e.g. "**Day 1:**")
                 if current_day:
                     organized_days.append(current_day)
                 current_day = []
             else:
-                # Try to match a POI name in this line
-                matched_poi = None
-                for poi in pois:
-                    if poi['Name'].lower() in line.lower():
-                        matched_poi = poi
-                        break
+                # Longest POI name in this line, with a fuzzy fallback for typos
+                matched_poi = matcher.match(line)
                 if matched_poi:
                     current_day.append(matched_poi)
 
@@ -164,25 +479,23 @@ class TravelPlanner:
 
         if len(organized_days) != preferences.trip_duration:
             # print("Warning: AI response didn't match required day count. Using fallback method.")
-            return self._simple_day_organization(pois, preferences)
+            with tracing.span(tracing.FALLBACK_SPAN, reason="day count", parsed_days=len(organized_days)):
+                return self._simple_day_organization(pois, preferences)
 
         for day_pois in organized_days:
             if len(day_pois) != preferences.realization_of_pois_per_day:
                 # print("Warning: AI response didn't match required activities per day. Using fallback method.")
-                return self._simple_day_organization(pois, preferences)
+                with tracing.span(tracing.FALLBACK_SPAN, reason="activities per day", parsed_activities=len(day_pois)):
+                    return self._simple_day_organization(pois, preferences)
 
         return organized_days
 
     def _simple_day_organization(self, pois: List[Dict], preferences: UserPreferences) -> List[List[Dict]]:
         # System if the AI doesn't comply with required day/activities
-        def interest_score(poi):
-            poi_tags = poi['Tags'].lower().split(',')
-            poi_tags = [tag.strip() for tag in poi_tags]
-            return sum(1 for interest in preferences.interests if any(interest.lower() in tg for tg in poi_tags))
-
-        sorted_pois = sorted(pois, key=interest_score, reverse=True)
+        # Best interest relevance first; equally relevant POIs keep their order
+        scores = self._relevance(pois).ranking_scores(pois, preferences.interests)
         total_needed = preferences.trip_duration * preferences.realization_of_pois_per_day
-        selected_pois = sorted_pois[:total_needed]
+        selected_pois = [pois[i] for i in np.argsort(-scores, kind='stable')[:total_needed]]
 
         organized_days = []
         for i in range(0, len(selected_pois), preferences.realization_of_pois_per_day):
@@ -192,14 +505,21 @@ class TravelPlanner:
 
         return organized_days
 
-    def _create_day_plan(self, day_number: int, pois: List[Dict], preferences: UserPreferences) -> Dict:
-        # Summary and build a list of activities for each day
-        day_summary = self.description_generator.generate_day_summary(pois)
+    def _create_day_plan(
+        self,
+        day_number: int,
+        pois: List[Dict],
+        preferences: UserPreferences,
+        day_summary: str,
+        descriptions: List[str],
+        planned_names: Optional[Set[str]] = None,
+        loaded=None
+    ) -> Dict:
+        # Build a list of activities for each day from the already generated texts
         activities = []
         start_time = datetime.strptime(preferences.preferred_start_time, "%H:%M")
 
-        for poi in pois:
-            description = self.description_generator.generate_poi_description(poi)
+        for poi, description in zip(pois, descriptions):
             # Each visit is 2h by default
             visit_duration = 120
             end_time = start_time + timedelta(minutes=visit_duration)
@@ -210,6 +530,10 @@ class TravelPlanner:
                 "description": description,
                 "timing": f"{start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}"
             }
+            if self.poi_manager is not None:
+                activity["also_nearby"] = self.poi_manager.nearby_suggestions(
+                    poi, planned_names or (), preferences.interests, loaded=loaded
+                )
             activities.append(activity)
             # 30 min break in between
             start_time = end_time + timedelta(minutes=30)
@@ -220,17 +544,17 @@ class TravelPlanner:
             "activities": activities
         }
 
-    def _generate_trip_summary(self, organized_days: List[List[Dict]], preferences: UserPreferences) -> str:
-        # Summarize the entire trip
+    def _trip_summary_prompts(self, organized_days: List[List[Dict]], preferences: UserPreferences):
         total_pois = sum(len(day) for day in organized_days)
-        regions = set()
-        categories = set()
+        # Ordered (not set) so identical trips give identical, cacheable prompts
+        regions = {}
+        categories = {}
 
         for day in organized_days:
             for poi in day:
-                regions.add(poi['AddressRegion'])
+                regions[poi['AddressRegion']] = None
                 if 'Tags' in poi:
-                    categories.update(tag.strip() for tag in poi['Tags'].split(','))
+                    categories.update((tag.strip(), None) for tag in poi['Tags'].split(','))
 
         system_prompt = "You are a travel expert creating engaging trip summaries."
         user_prompt = f"""
@@ -243,9 +567,26 @@ class TravelPlanner:
 
         Include highlights and what makes this itinerary special.
         """
+        return system_prompt, user_prompt
 
+    def _generate_trip_summary(self, organized_days: List[List[Dict]], preferences: UserPreferences) -> str:
+        # Summarize the entire trip
+        system_prompt, user_prompt = self._trip_summary_prompts(organized_days, preferences)
         try:
             return self.description_generator.text_generator.generate_chat_completion(system_prompt, user_prompt)
         except Exception as e:
             print(f"Error generating trip summary: {str(e)}")
             return "Trip summary unavailable"
+
+    def _stream_trip_summary(self, organized_days: List[List[Dict]], preferences: UserPreferences):
+        # Same summary, yielded piece by piece
+        system_prompt, user_prompt = self._trip_summary_prompts(organized_days, preferences)
+        streamed = False
+        try:
+            for piece in self.description_generator.text_generator.stream_chat_completion(system_prompt, user_prompt):
+                streamed = True
+                yield piece
+        except Exception as e:
+            print(f"Error generating trip summary: {str(e)}")
+            if not streamed:
+                yield "Trip summary unavailable"
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from datetime import datetime
 from typing import List, Optional
 from config import (
     DEFAULT_DAILY_ACTIVITIES,
@@ -28,11 +29,48 @@ class UserPreferences:
         if self.special_requirements is None:
             self.special_requirements = []
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserPreferences":
+        # Builds validated preferences from a JSON record with the dataclass field names
+        known = {field.name for field in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown preference fields: {', '.join(sorted(unknown))}")
+        if "interests" not in data:
+            raise ValueError("At least one interest must be specified")
+        preferences = cls(**data)
+        preferences.validate()
+        return preferences
+
     def validate(self):
-        # Basic validations on preferences
+        # Basic validations on preferences; types are checked too, since JSON
+        # records (service, batch) reach here without any other conversion
+        for name in ("interests", "regions", "special_requirements"):
+            value = getattr(self, name)
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ValueError(f"{name} must be a list of strings")
+
         if not self.interests:
             raise ValueError("At least one interest must be specified")
 
+        for name in ("trip_duration", "realization_of_pois_per_day"):
+            value = getattr(self, name)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"{name} must be an integer")
+
+        for name in ("preferred_start_time", "preferred_end_time"):
+            value = getattr(self, name)
+            try:
+                datetime.strptime(value, "%H:%M")
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a time in HH:MM format")
+
+        if not isinstance(self.require_breaks, bool):
+            raise ValueError("require_breaks must be true or false")
+
+        if not isinstance(self.preferred_transportation, str):
+            raise ValueError("preferred_transportation must be a string")
+
         if self.trip_duration < 1 or self.trip_duration > 14:
             raise ValueError("Trip duration must be between 1 and 14 days")
 